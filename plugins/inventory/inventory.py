@@ -2,8 +2,11 @@ from __future__ import absolute_import, division, print_function
 
 __metaclass__ = type
 
+import copy
 import json
+import os
 import re
+import tempfile
 from sys import version as python_version
 
 from ansible.errors import AnsibleError
@@ -11,7 +14,18 @@ from ansible.module_utils._text import to_native, to_text
 from ansible.module_utils.ansible_release import __version__ as ansible_version
 from ansible.module_utils.six.moves.urllib import error as urllib_error
 from ansible.module_utils.urls import open_url
-from ansible.plugins.inventory import BaseInventoryPlugin, Cacheable
+from ansible.plugins.inventory import (
+    BaseInventoryPlugin,
+    Cacheable,
+    Constructable,
+)
+from ansible.utils.vars import combine_vars
+from jinja2 import Environment, TemplateSyntaxError, meta
+
+from ansible_collections.axiansdeveloper.ipfabric.plugins.plugin_utils.profiling import (  # noqa: E501
+    Profiler,
+    compare_reports,
+)
 
 
 DOCUMENTATION = """
@@ -23,6 +37,7 @@ DOCUMENTATION = """
     description:
       - Get inventory from IPFabric
     extends_documentation_fragment:
+      - constructed
       - inventory_cache
     options:
         plugin:
@@ -76,12 +91,107 @@ DOCUMENTATION = """
                 - The choices of I(group_by) will be changed by this option.
             default: True
             type: boolean
+        profile:
+            description:
+                - Profile fetch, decode, group and variable phases of the inventory run.
+                - Writes a JSON report with time, peak memory and function calls per device of each phase to I(profile_output).
+                - Function calls only count calls into this collection's plugins, peak memory is only measured on Python 3.9+.
+            default: False
+            type: boolean
+            env:
+              - name: IPFABRIC_PROFILE
+        profile_output:
+            description:
+                - File the profiling report is written to.
+                - Defaults to C(ipfabric_profile.json) in the system temporary directory.
+            type: path
+            env:
+              - name: IPFABRIC_PROFILE_OUTPUT
+        profile_baseline:
+            description:
+                - Profiling report to compare against when I(profile) is enabled.
+                - The run fails when function calls per device or peak memory of a phase exceed the baseline by more than I(profile_tolerance).
+                - Peak memory is only compared when the Python and ansible-core versions match those the baseline was recorded with.
+            type: path
+            env:
+              - name: IPFABRIC_PROFILE_BASELINE
+        profile_tolerance:
+            description: Allowed relative increase over I(profile_baseline).
+            default: 0.1
+            type: float
+        profile_record_dir:
+            description: Directory API responses are recorded to, for replay with I(profile_replay_dir).
+            type: path
+            env:
+              - name: IPFABRIC_PROFILE_RECORD
+        profile_replay_dir:
+            description: Directory of recorded API responses used instead of querying IPFabric.
+            type: path
+            env:
+              - name: IPFABRIC_PROFILE_REPLAY
 """  # noqa: E501
 
 
-class InventoryModule(BaseInventoryPlugin, Cacheable):
+_MISSING = object()
+
+
+class InventoryModule(BaseInventoryPlugin, Constructable, Cacheable):
     NAME = "axians.ipfabric.ipf_inventory"
 
+    _group_extractors = None
+    profiler = None
+
+    def _fixture_path(self, directory, url):
+        name = url[len(self.api_endpoint):].strip("/").replace("/", "_")
+        return os.path.join(directory, name + ".json")
+
+    def _read_payload(self, url, data=None, method=None):
+        if self.profile_replay_dir:
+            fixture = self._fixture_path(self.profile_replay_dir, url)
+            with open(fixture, "rb") as f:
+                return f.read()
+
+        try:
+            response = open_url(
+                url,
+                headers=self.headers,
+                timeout=self.timeout,
+                validate_certs=self.validate_certs,
+                method=method,
+                data=data,
+            )
+        except urllib_error.HTTPError as e:
+            # TODO
+            raise AnsibleError(
+                to_native(e.fp.read()),
+            )
+        payload = response.read()
+
+        if self.profile_record_dir:
+            fixture = self._fixture_path(self.profile_record_dir, url)
+            with open(fixture, "wb") as f:
+                f.write(payload)
+        return payload
+
+    def _decode_payload(self, payload):
+        try:
+            raw_data = to_text(
+                payload,
+                errors="surrogate_or_strict",
+            )
+
+        except UnicodeError:
+            raise AnsibleError(
+                "Incorrect encoding of fetched payload from IPFabric API.",
+            )
+
+        try:
+            return json.loads(raw_data)
+        except ValueError:
+            raise AnsibleError(
+                "Incorrect JSON payload: %s" % raw_data,
+            )
+
     def _fetch_information(self, url, data=None, method=None):
         method = method or ("POST" if data else "GET")
         results = None
@@ -107,43 +217,19 @@ class InventoryModule(BaseInventoryPlugin, Cacheable):
         if need_to_fetch:
             self.display.v("Fetching: " + url)
 
-            try:
-                response = open_url(
-                    url,
-                    headers=self.headers,
-                    timeout=self.timeout,
-                    validate_certs=self.validate_certs,
-                    method=method,
-                    data=data,
-                )
-            except urllib_error.HTTPError as e:
-                # TODO
-                raise AnsibleError(
-                    to_native(e.fp.read()),
-                )
-
-            try:
-                raw_data = to_text(
-                    response.read(),
-                    errors="surrogate_or_strict",
-                )
-
-            except UnicodeError:
-                raise AnsibleError(
-                    "Incorrect encoding of fetched payload from IPFabric API.",
-                )
-
-            try:
-                results = json.loads(raw_data)
-            except ValueError:
-                raise AnsibleError(
-                    "Incorrect JSON payload: %s" % raw_data,
-                )
+            if self.profiler:
+                with self.profiler.phase("fetch"):
+                    payload = self._read_payload(url, data, method)
+                with self.profiler.phase("decode"):
+                    results = self._decode_payload(payload)
+            else:
+                payload = self._read_payload(url, data, method)
+                results = self._decode_payload(payload)
 
             if user_cache_setting:
                 self._cache[cache_key] = results
 
-            return results
+        return results
 
     def fetch_api_info(self):
         version = self._fetch_information(self.api_endpoint + "/os/version")
@@ -207,15 +293,16 @@ class InventoryModule(BaseInventoryPlugin, Cacheable):
 
     @property
     def group_extractors(self):
-        extractors = {
-            "loginIp": self.extract_ip,
-            self._pluralize_group_by("platform"): self.extract_platform,
-            self._pluralize_group_by("site"): self.extract_site,
-            self._pluralize_group_by("vendor"): self.extract_vendor,
-            "family": self.extract_family,
-        }
+        if self._group_extractors is None:
+            self._group_extractors = {
+                "loginIp": self.extract_ip,
+                self._pluralize_group_by("platform"): self.extract_platform,
+                self._pluralize_group_by("site"): self.extract_site,
+                self._pluralize_group_by("vendor"): self.extract_vendor,
+                "family": self.extract_family,
+            }
 
-        return extractors
+        return self._group_extractors
 
     def generate_group_name(self, group, group_for_host):
         if isinstance(group, bool):
@@ -259,25 +346,159 @@ class InventoryModule(BaseInventoryPlugin, Cacheable):
                     host=hostname,
                 )
 
+    def _expression_names(self, expression):
+        try:
+            return self._expression_names_cache[expression]
+        except KeyError:
+            pass
+
+        try:
+            ast = Environment().parse("{{ %s }}" % expression)
+            names = tuple(sorted(meta.find_undeclared_variables(ast)))
+        except TemplateSyntaxError:
+            names = None
+        self._expression_names_cache[expression] = names
+        return names
+
+    def _compose(self, template, variables, *args, **kwargs):
+        # Devices sharing the values an expression refers to share its
+        # result, so the templar only evaluates each distinct combination
+        # once per parse instead of once per host.
+        compose = super(InventoryModule, self)._compose
+        names = self._expression_names(template)
+        if names is None:
+            return compose(template, variables, *args, **kwargs)
+
+        # The type is part of the key as True, 1 and 1.0 compare equal.
+        key = [template]
+        for name in names:
+            value = variables.get(name, _MISSING)
+            key.append((type(value), value))
+        key = tuple(key)
+        try:
+            hash(key)
+        except TypeError:
+            return compose(template, variables, *args, **kwargs)
+
+        if key not in self._composed:
+            self._composed[key] = compose(template, variables, *args, **kwargs)
+
+        result = self._composed[key]
+        if isinstance(result, (dict, list)):
+            return copy.deepcopy(result)
+        return result
+
+    def add_device_to_constructed(self, device, hostname):
+        if not (self.compose or self.groups or self.keyed_groups):
+            return
+
+        # Host vars such as inventory_hostname and group_names are
+        # available to compose, groups and keyed_groups alike.
+        variables = combine_vars(
+            dict(device, ansible_host=device["loginIp"]),
+            self.inventory.get_host(hostname).get_vars(),
+        )
+
+        if self.compose:
+            self._set_composite_vars(
+                self.compose,
+                variables,
+                hostname,
+                strict=self.strict,
+            )
+            # refetch host vars in case new ones have been created above
+            variables = combine_vars(
+                variables,
+                self.inventory.get_host(hostname).get_vars(),
+            )
+
+        self._add_host_to_composed_groups(
+            self.groups,
+            variables,
+            hostname,
+            strict=self.strict,
+            fetch_hostvars=False,
+        )
+        self._add_host_to_keyed_groups(
+            self.keyed_groups,
+            variables,
+            hostname,
+            strict=self.strict,
+            fetch_hostvars=False,
+        )
+
+    def set_device_variables(self, device, hostname):
+        self.inventory.add_host(hostname)
+        self.inventory.set_variable(
+            hostname,
+            "ansible_host",
+            device["loginIp"],
+        )
+        self.inventory.set_variable(
+            hostname,
+            "family",
+            device["family"],
+        )
+
     def main(self):
         self.fetch_api_info()
 
         self.fetch_devices()
 
+        if self.profiler:
+            self.main_profiled()
+            return
+
         for device in self.devices_list:
             hostname = device["hostname"]
-            self.inventory.add_host(hostname)
-            self.inventory.set_variable(
-                hostname,
-                "ansible_host",
-                device["loginIp"],
-            )
-            self.inventory.set_variable(
-                hostname,
-                "family",
-                device["family"],
-            )
+            self.set_device_variables(device=device, hostname=hostname)
             self.add_device_to_groups(device=device, hostname=hostname)
+            self.add_device_to_constructed(device=device, hostname=hostname)
+
+    def main_profiled(self):
+        # Each phase runs over all devices so the profiler is entered once
+        # per phase rather than once per device.
+        self.profiler.devices = len(self.devices_list)
+        phases = (
+            ("set_variable", self.set_device_variables),
+            ("add_device_to_groups", self.add_device_to_groups),
+            ("constructed", self.add_device_to_constructed),
+        )
+        for name, add in phases:
+            with self.profiler.phase(name):
+                for device in self.devices_list:
+                    add(device=device, hostname=device["hostname"])
+
+    def write_profile(self):
+        report = self.profiler.report()
+        output = self.get_option("profile_output") or os.path.join(
+            tempfile.gettempdir(),
+            "ipfabric_profile.json",
+        )
+        with open(output, "w") as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+        self.display.v("Profiling report written to " + output)
+
+        baseline_path = self.get_option("profile_baseline")
+        if baseline_path:
+            with open(baseline_path) as f:
+                baseline = json.load(f)
+            if report["versions"] != baseline.get("versions"):
+                self.display.warning(
+                    "Profiling baseline %s was recorded with %s, not "
+                    "comparing peak memory."
+                    % (baseline_path, baseline.get("versions")),
+                )
+            regressions = compare_reports(
+                report,
+                baseline,
+                self.get_option("profile_tolerance"),
+            )
+            if regressions:
+                raise AnsibleError(
+                    "Inventory performance regressed against %s: %s"
+                    % (baseline_path, "; ".join(regressions)),
+                )
 
     def parse(self, inventory, loader, path, cache=True):
         super(InventoryModule, self).parse(
@@ -297,6 +518,15 @@ class InventoryModule(BaseInventoryPlugin, Cacheable):
         self.group_by = self.get_option("group_by")
         self.group_names_raw = self.get_option("group_names_raw")
         self.plurals = self.get_option("plurals")
+        self.compose = self.get_option("compose") or {}
+        self.groups = self.get_option("groups") or {}
+        self.keyed_groups = self.get_option("keyed_groups") or []
+        self.strict = self.get_option("strict")
+        self._expression_names_cache = {}
+        self._composed = {}
+        self._group_extractors = None
+        self.profile_record_dir = self.get_option("profile_record_dir")
+        self.profile_replay_dir = self.get_option("profile_replay_dir")
 
         self.headers = {
             "User-Agent": "ansible %s Python %s"
@@ -307,4 +537,14 @@ class InventoryModule(BaseInventoryPlugin, Cacheable):
         if token:
             self.headers.update({"X-API-Token": token})
 
-        self.main()
+        if not self.get_option("profile"):
+            self.main()
+            return
+
+        self.profiler = Profiler()
+        self.profiler.start()
+        try:
+            self.main()
+        finally:
+            self.profiler.stop()
+        self.write_profile()
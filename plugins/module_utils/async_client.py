@@ -0,0 +1,249 @@
+from .client import Response
+from .client import check_auth
+from .errors import IPFabricError
+from .errors import UnexpectedAPIResponse
+import asyncio
+import json
+
+try:
+    import aiohttp
+
+    HAS_AIOHTTP = True
+except ImportError:
+    HAS_AIOHTTP = False
+
+
+class AsyncClient:
+    def __init__(
+        self,
+        host,
+        token,
+        timeout=None,
+        validate_certs=True,
+        max_concurrency=10,
+    ):
+        if not HAS_AIOHTTP:
+            raise IPFabricError("aiohttp is required to use AsyncClient.")
+
+        self.host = host
+        self.token = token
+        self.timeout = timeout
+        self.validate_certs = validate_certs
+        self.max_concurrency = max_concurrency
+
+        self._auth_header = None
+        self._semaphore = None
+        self._session = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+        # Both belong to the event loop that is ending, a later run on
+        # another loop creates its own.
+        self._semaphore = None
+
+    @property
+    def auth_header(self):
+        if not self._auth_header:
+            self._auth_header = self._login()
+        return self._auth_header
+
+    def _login(self):
+        if self.token:
+            return {"X-API-Token": self.token}
+
+    # The semaphore and session are created lazily so they belong to the
+    # running event loop.
+    @property
+    def semaphore(self):
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._semaphore
+
+    @property
+    def session(self):
+        if self._session is None:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(
+                    limit=self.max_concurrency,
+                    ssl=None if self.validate_certs else False,
+                ),
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+            )
+        return self._session
+
+    async def _request(self, method, path, data=None, headers=None):
+        session = self.session
+        async with self.semaphore:
+            try:
+                async with session.request(
+                    method,
+                    path,
+                    data=data,
+                    headers=headers,
+                ) as raw_resp:
+                    body = await raw_resp.read()
+            except aiohttp.ClientError as e:
+                raise IPFabricError(str(e))
+            except asyncio.TimeoutError:
+                raise IPFabricError(
+                    "Timed out waiting for IPFabric: {0}".format(path),
+                )
+
+        check_auth(raw_resp.status, raw_resp.reason)
+        return Response(raw_resp.status, body, raw_resp.headers)
+
+    async def request(self, method, path, query=None, data=None):
+        url = "{0}/api/v1/{1}".format(self.host, path)
+
+        headers = dict(Accept="application/json", **self.auth_header)
+        if data is not None:
+            data = json.dumps(data, separators=(",", ":"))
+            headers["Content-Type"] = "application/json"
+        return await self._request(method, url, data=data, headers=headers)
+
+    async def get(self, path):
+        resp = await self.request("GET", path)
+        if resp.status in (200, 404):
+            return resp
+        raise UnexpectedAPIResponse(resp.status, resp.data)
+
+    async def post(self, path, data):
+        resp = await self.request("POST", path, data=data)
+        if resp.status in (200, 201):
+            return resp
+        raise UnexpectedAPIResponse(resp.status, resp.data)
+
+    async def iter_table(
+        self,
+        path,
+        columns,
+        snapshot_id=None,
+        filters=None,
+        sort=None,
+        reports=None,
+        page_size=1000,
+    ):
+        if page_size < 1:
+            raise IPFabricError("page_size must be at least 1.")
+
+        def page(start):
+            data = {
+                "columns": columns,
+                "pagination": {"limit": page_size, "start": start},
+            }
+            if snapshot_id:
+                data["snapshot"] = snapshot_id
+            if filters:
+                data["filters"] = filters
+            if sort:
+                data["sort"] = sort
+            if reports:
+                data["reports"] = reports
+            return self.post("tables/{0}".format(path), data)
+
+        first = (await page(0)).json
+        rows = first["data"]
+        for row in rows:
+            yield row
+
+        count = first.get("_meta", {}).get("count")
+        if count is None:
+            # Without a row count the pages can only be fetched in turn.
+            start = page_size
+            while len(rows) == page_size:
+                rows = (await page(start)).json["data"]
+                for row in rows:
+                    yield row
+                start += page_size
+            return
+
+        pages = await asyncio.gather(
+            *[page(start) for start in range(page_size, count, page_size)]
+        )
+        for resp in pages:
+            for row in resp.json["data"]:
+                yield row
+
+    async def get_snapshots(self, snapshot_id=None):
+        resp = await self.request("GET", "snapshots")
+        if resp.status == 200:
+            if snapshot_id:
+                single_snapshot = [
+                    snapshot
+                    for snapshot in resp.json
+                    if snapshot_id == snapshot["id"]
+                ]
+
+                if len(single_snapshot) == 0:
+                    raise IPFabricError("Snapshot not found.")
+
+                return single_snapshot
+            return resp.json
+        raise UnexpectedAPIResponse(resp.status, resp.data)
+
+    async def rediscover_existing_snapshot(
+        self,
+        snapshot_id,
+        devices,
+    ):
+        data = {"snList": devices}
+        url = "snapshots/{0}/devices".format(snapshot_id)
+        return await self.request("POST", url, data=data)
+
+    async def rediscover_new_snapshot(self, ips):
+        data = {
+            "networks": {
+                "include": ["{0}/32".format(ip) for ip in ips],
+            },
+            "seedList": ips,
+        }
+        return await self.request("POST", "snapshots", data=data)
+
+    async def create_snapshot(self, snapshot_id=None, devices=None, ips=None):
+        if snapshot_id and devices:
+            resp = await self.rediscover_existing_snapshot(
+                snapshot_id,
+                devices,
+            )
+        elif ips:
+            resp = await self.rediscover_new_snapshot(ips)
+        else:
+            resp = await self.request("POST", "snapshots")
+
+        if resp.status == 200 and resp.json["success"]:
+            await asyncio.sleep(1)
+            iterations = 0
+            snapshot = (await self.get_snapshots())[0]
+            while snapshot["state"] != "discovering" and iterations < 10:
+                await asyncio.sleep(1)
+                snapshot = (await self.get_snapshots())[0]
+                iterations += 1
+            return snapshot
+
+        raise IPFabricError("Failed to create snapshot.")
+
+    async def delete_snapshot(self, snapshot_id):
+        if await self.get_snapshots(snapshot_id=snapshot_id):
+            resp = await self.request(
+                "DELETE",
+                "snapshots/{0}".format(snapshot_id),
+            )
+            if resp.status == 204:
+                return True
+            raise IPFabricError("Snapshot failed to delete.")
+
+    async def snapshot_load(self, snapshot_id, state, check_exists=True):
+        if not check_exists or await self.get_snapshots(snapshot_id):
+            url = "snapshots/{0}/{1}".format(snapshot_id, state)
+            resp = await self.request("POST", url)
+            if resp.status == 204:
+                return resp
+            raise IPFabricError("Snapshot failed to {0}.".format(state))
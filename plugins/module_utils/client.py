@@ -8,6 +8,25 @@ import json
 import time
 
 
+def check_auth(status, reason):
+    if status == 401:
+        raise AuthError(
+            "Failed to authenticate with IPFabric: {0} {1}"
+            " (check token)".format(
+                status,
+                reason,
+            ),
+        )
+    elif status == 403:
+        raise AuthError(
+            "Insufficient API Rights Check Permissions: "
+            "{0} {1}".format(
+                status,
+                reason,
+            ),
+        )
+
+
 class Response:
     def __init__(self, status, data, headers=None):
         self.status = status
@@ -47,9 +66,9 @@ class Client:
         if self.token:
             return {"X-API-Token": self.token}
 
-    def _request(self, method, path, data=None, headers=None):
+    def _open(self, method, path, data=None, headers=None):
         try:
-            raw_resp = self._client.open(
+            return self._client.open(
                 method,
                 path,
                 data=data,
@@ -58,26 +77,17 @@ class Client:
                 validate_certs=self.validate_certs,
             )
         except HTTPError as e:
-            if e.code == 401:
-                raise AuthError(
-                    "Failed to authenticate with IPFabric: {0} {1}"
-                    " (check token)".format(
-                        e.code,
-                        e.reason,
-                    ),
-                )
-            elif e.code == 403:
-                raise AuthError(
-                    "Insufficient API Rights Check Permissions: "
-                    "{0} {1}".format(
-                        e.code,
-                        e.reason,
-                    ),
-                )
-            return Response(e.code, e.read(), e.headers)
+            check_auth(e.code, e.reason)
+            raise
         except URLError as e:
             raise IPFabricError(e.reason)
 
+    def _request(self, method, path, data=None, headers=None):
+        try:
+            raw_resp = self._open(method, path, data=data, headers=headers)
+        except HTTPError as e:
+            return Response(e.code, e.read(), e.headers)
+
         return Response(raw_resp.status, raw_resp.read(), raw_resp.headers)
 
     def request(self, method, path, query=None, data=None):
@@ -101,6 +111,50 @@ class Client:
             return resp
         raise UnexpectedAPIResponse(resp.status, resp.data)
 
+    def download(self, path, fileobj, chunk_size=65536):
+        url = "{0}/api/v1/{1}".format(self.host, path)
+        try:
+            raw_resp = self._open("GET", url, headers=dict(self.auth_header))
+        except HTTPError as e:
+            raise UnexpectedAPIResponse(e.code, e.read())
+
+        for chunk in iter(lambda: raw_resp.read(chunk_size), b""):
+            fileobj.write(chunk)
+
+    def iter_table(
+        self,
+        path,
+        columns,
+        snapshot_id=None,
+        filters=None,
+        sort=None,
+        reports=None,
+        page_size=1000,
+    ):
+        if page_size < 1:
+            raise IPFabricError("page_size must be at least 1.")
+
+        start = 0
+        while True:
+            data = {
+                "columns": columns,
+                "pagination": {"limit": page_size, "start": start},
+            }
+            if snapshot_id:
+                data["snapshot"] = snapshot_id
+            if filters:
+                data["filters"] = filters
+            if sort:
+                data["sort"] = sort
+            if reports:
+                data["reports"] = reports
+            rows = self.post("tables/{0}".format(path), data).json["data"]
+            for row in rows:
+                yield row
+            if len(rows) < page_size:
+                return
+            start += page_size
+
     def get_snapshots(self, snapshot_id=None):
         resp = self.request("GET", "snapshots")
         if resp.status == 200:
@@ -140,7 +194,7 @@ class Client:
 
     def create_snapshot(self, snapshot_id=None, devices=None, ips=None):
         if snapshot_id and devices:
-            resp = self.rediscover_snapshot(snapshot_id, devices)
+            resp = self.rediscover_existing_snapshot(snapshot_id, devices)
         elif ips:
             resp = self.rediscover_new_snapshot(ips)
         else:
@@ -150,8 +204,9 @@ class Client:
             time.sleep(1)
             iterations = 0
             snapshot = self.get_snapshots()[0]
-            while snapshot["state"] != "discovering" and iterations >= 10:
-                snapshot = self.get_snapshots()[0]["state"]
+            while snapshot["state"] != "discovering" and iterations < 10:
+                time.sleep(1)
+                snapshot = self.get_snapshots()[0]
                 iterations += 1
             return snapshot
 
@@ -164,8 +219,8 @@ class Client:
                 return True
             raise IPFabricError("Snapshot failed to delete.")
 
-    def snapshot_load(self, snapshot_id, state):
-        if self.get_snapshots(snapshot_id):
+    def snapshot_load(self, snapshot_id, state, check_exists=True):
+        if not check_exists or self.get_snapshots(snapshot_id):
             url = "snapshots/{0}/{1}".format(snapshot_id, state)
             resp = self.request("POST", url)
             if resp.status == 204:
@@ -3,6 +3,7 @@ from __future__ import absolute_import, division, print_function
 __metaclass__ = type
 
 from ansible.module_utils.basic import env_fallback
+from concurrent.futures import ThreadPoolExecutor
 
 SHARED_SPECS = dict(
     ipfabric=dict(
@@ -36,3 +37,14 @@ SHARED_SPECS = dict(
 
 def get_spec(*param_names):
     return dict((p, SHARED_SPECS[p]) for p in param_names)
+
+
+def run_concurrently(func, items, max_workers):
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return list(executor.map(func, items))
+
+
+def require_positive(module, *param_names):
+    for name in param_names:
+        if module.params[name] < 1:
+            module.fail_json(msg="{0} must be at least 1.".format(name))
@@ -0,0 +1,313 @@
+#!/usr/bin/python
+
+from __future__ import absolute_import, division, print_function
+from ansible.module_utils.basic import AnsibleModule
+from ..module_utils import errors
+from ..module_utils import client
+from ..module_utils import ipfabric_utils
+import json
+import os
+import tempfile
+
+__metaclass__ = type
+
+DOCUMENTATION = r"""
+---
+module: config_backup
+
+short_description: Back up saved Device Configurations from IPFabric
+
+version_added: "0.0.4"
+extends_documentation_fragment:
+  - axiansdeveloper.ipfabric.ipfabric
+
+description:
+  - Download the latest saved configuration of each device to I(dest).
+  - A hash index kept in I(dest) records the configuration hash of every
+    file, only configurations whose hash changed are downloaded.
+  - Configurations are streamed to disk and downloaded concurrently.
+
+options:
+  dest:
+    description:
+      - Directory the configurations are saved to, one C(<sn>.txt)
+        file per device.
+    required: true
+    type: path
+  snapshot_id:
+    description:
+      - Only back up devices present in this Snapshot.
+      - The configuration records are filtered by the serial numbers of
+        these devices, in chunks of 100 fetched concurrently.
+    required: false
+    type: str
+  max_workers:
+    description:
+      - Maximum number of configurations downloaded, or chunks of
+        configuration records fetched, at once, at least 1.
+    required: false
+    default: 10
+    type: int
+  page_size:
+    description:
+      - Number of configuration records fetched per request, at least 1.
+    required: false
+    default: 1000
+    type: int
+
+author:
+    - Alex Gittings (@minitriga)
+"""
+
+EXAMPLES = r"""
+- name: "Test IPFabric modules"
+  connection: local
+  hosts: localhost
+  gather_facts: False
+
+  tasks:
+    - name: Back up Device Configurations
+      config_backup:
+        ipfabric:
+          host: https://ipfabric.local
+          token: thisIsMyToken
+        dest: /var/backups/ipfabric
+        snapshot_id: $last
+"""
+
+RETURN = r"""
+msg:
+  description: Message indicating failure or info about what has happened.
+  returned: always
+  type: str
+data:
+  description: Data returned from the module.
+  returned: always
+  type: dict
+  contains:
+    downloaded:
+      description: Serial numbers whose configuration was downloaded.
+      type: list
+    unchanged:
+      description: Number of configurations already up to date.
+      type: int
+    skipped:
+      description:
+        - Serial numbers that cannot be used as a file name in I(dest).
+      type: list
+"""
+
+INDEX_FILE = ".hash_index.json"
+# Serial numbers per filter, keeps the request body small.
+FILTER_CHUNK_SIZE = 100
+
+
+def read_index(dest):
+    path = os.path.join(dest, INDEX_FILE)
+    if os.path.exists(path):
+        with open(path) as f:
+            try:
+                return json.load(f)
+            except ValueError as e:
+                raise errors.IPFabricError(
+                    "Invalid hash index {0}: {1}".format(path, e),
+                )
+    return {}
+
+
+def write_index(dest, index):
+    fd, tmp_path = tempfile.mkstemp(dir=dest)
+    with os.fdopen(fd, "w") as f:
+        json.dump(index, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, os.path.join(dest, INDEX_FILE))
+
+
+def serial_filters(module, client):
+    if not module.params["snapshot_id"]:
+        return [None]
+
+    serials = sorted(
+        set(
+            row["sn"]
+            for row in client.iter_table(
+                "inventory/devices",
+                ["sn"],
+                snapshot_id=module.params["snapshot_id"],
+                page_size=module.params["page_size"],
+            )
+        ),
+    )
+    return [
+        {
+            "or": [
+                {"sn": ["eq", sn]}
+                for sn in serials[i:i + FILTER_CHUNK_SIZE]
+            ],
+        }
+        for i in range(0, len(serials), FILTER_CHUNK_SIZE)
+    ]
+
+
+def fetch_latest_configs(module, client, filters):
+    configs = {}
+    for row in client.iter_table(
+        "management/configuration",
+        ["sn", "hostname", "hash", "lastChange"],
+        filters=filters,
+        sort={"order": "desc", "column": "lastChange"},
+        page_size=module.params["page_size"],
+    ):
+        configs.setdefault(row["sn"], row)
+    return configs
+
+
+def latest_configs(module, client):
+    # Each chunk covers different serial numbers, so the chunks are
+    # fetched concurrently and merged.
+    configs = {}
+    for chunk in ipfabric_utils.run_concurrently(
+        lambda filters: fetch_latest_configs(module, client, filters),
+        serial_filters(module, client),
+        module.params["max_workers"],
+    ):
+        configs.update(chunk)
+    return configs
+
+
+def is_safe_sn(sn):
+    return (
+        bool(sn)
+        and sn not in (".", "..")
+        and os.path.basename(sn) == sn
+        and "\\" not in sn
+    )
+
+
+def config_path(dest, sn):
+    if not is_safe_sn(sn):
+        raise errors.IPFabricError(
+            "Serial number {0!r} is not a valid file name.".format(sn),
+        )
+    return os.path.join(dest, "{0}.txt".format(sn))
+
+
+def download_config(client, dest, config):
+    fd, tmp_path = tempfile.mkstemp(dir=dest)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            client.download(
+                "tables/management/configuration/download?hash={0}".format(
+                    config["hash"],
+                ),
+                f,
+            )
+        os.replace(tmp_path, config_path(dest, config["sn"]))
+    except Exception as e:
+        os.remove(tmp_path)
+        return config, str(e)
+    return config, None
+
+
+def run(module, client):
+    dest = module.params["dest"]
+    if not os.path.isdir(dest):
+        raise errors.IPFabricError(
+            "Destination {0} is not a directory.".format(dest),
+        )
+
+    index = read_index(dest)
+    configs = latest_configs(module, client)
+    skipped = sorted(sn for sn in configs if not is_safe_sn(sn))
+    for sn in skipped:
+        module.warn(
+            "Skipping serial number {0!r}, it is not a valid file "
+            "name.".format(sn),
+        )
+        del configs[sn]
+    pending = [
+        config
+        for sn, config in configs.items()
+        if index.get(sn, {}).get("hash") != config["hash"]
+        or not os.path.exists(config_path(dest, sn))
+    ]
+    unchanged = len(configs) - len(pending)
+
+    if module.check_mode or not pending:
+        data = dict(
+            downloaded=[config["sn"] for config in pending],
+            unchanged=unchanged,
+            skipped=skipped,
+        )
+        msg = "{0} configurations to download".format(len(pending))
+        return bool(pending), msg, data
+
+    results = ipfabric_utils.run_concurrently(
+        lambda config: download_config(client, dest, config),
+        pending,
+        module.params["max_workers"],
+    )
+
+    downloaded = []
+    failed = []
+    for config, error in results:
+        if error:
+            failed.append("{0}: {1}".format(config["sn"], error))
+            continue
+        index[config["sn"]] = dict(
+            hostname=config["hostname"],
+            hash=config["hash"],
+        )
+        downloaded.append(config["sn"])
+    write_index(dest, index)
+
+    if failed:
+        raise errors.IPFabricError(
+            "Failed to download configurations: {0}".format(
+                "; ".join(failed),
+            ),
+        )
+
+    data = dict(downloaded=downloaded, unchanged=unchanged, skipped=skipped)
+    msg = "{0} configurations downloaded".format(len(downloaded))
+    return bool(downloaded), msg, data
+
+
+def main():
+
+    module = AnsibleModule(
+        argument_spec=dict(
+            ipfabric_utils.get_spec("ipfabric"),
+            dest=dict(
+                required=True,
+                type="path",
+            ),
+            snapshot_id=dict(
+                required=False,
+                type="str",
+            ),
+            max_workers=dict(
+                required=False,
+                default=10,
+                type="int",
+            ),
+            page_size=dict(
+                required=False,
+                default=1000,
+                type="int",
+            ),
+        ),
+        supports_check_mode=True,
+    )
+
+    ipfabric_utils.require_positive(module, "max_workers", "page_size")
+
+    try:
+        ipf_client = client.Client(**module.params["ipfabric"])
+        changed, msg, data = run(module, ipf_client)
+        module.exit_json(changed=changed, msg=msg, data=data)
+    except errors.IPFabricError as e:
+        module.fail_json(msg=str(e))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,272 @@
+#!/usr/bin/python
+
+from __future__ import absolute_import, division, print_function
+from ansible.module_utils.basic import AnsibleModule
+from ..module_utils import errors
+from ..module_utils import client
+from ..module_utils import ipfabric_utils
+import json
+import os
+import tempfile
+import threading
+
+__metaclass__ = type
+
+DOCUMENTATION = r"""
+---
+module: intent_facts
+
+short_description: Gather Intent Verification results from IPFabric
+
+version_added: "0.0.4"
+extends_documentation_fragment:
+  - axiansdeveloper.ipfabric.ipfabric
+
+description:
+  - Gather the results of every Intent Verification check of a Snapshot
+    with a single request.
+  - Optionally fetch the result rows of each check concurrently and
+    stream them to a JSON lines file.
+
+options:
+  snapshot_id:
+    description: Snapshot ID
+    required: false
+    default: $last
+    type: str
+  intents:
+    description:
+      - IDs or names of the intent checks to gather.
+      - All intent checks are gathered if not set.
+      - The module fails if an entry matches no intent check.
+    required: false
+    type: list
+    elements: str
+  dest:
+    description:
+      - File the result rows are written to, one JSON object with
+        C(intent) and C(row) keys per line.
+      - Result rows are not fetched if not set, nor in check mode.
+      - Rows of an intent check whose table could not be fetched may be
+        incomplete, its result then has an C(error).
+    required: false
+    type: path
+  detail_columns:
+    description:
+      - Columns fetched for each result row.
+      - Intent checks whose table lacks one of these columns report an
+        C(error) instead of failing the module.
+    required: false
+    default: [ sn, hostname ]
+    type: list
+    elements: str
+  max_workers:
+    description:
+      - Maximum number of result tables fetched at once, at least 1.
+    required: false
+    default: 10
+    type: int
+  page_size:
+    description: Number of result rows fetched per request, at least 1.
+    required: false
+    default: 1000
+    type: int
+
+author:
+    - Alex Gittings (@minitriga)
+"""
+
+EXAMPLES = r"""
+- name: "Test IPFabric modules"
+  connection: local
+  hosts: localhost
+  gather_facts: False
+
+  tasks:
+    - name: Gather Intent Verification results
+      intent_facts:
+        ipfabric:
+          host: https://ipfabric.local
+          token: thisIsMyToken
+      register: intents
+
+    - name: Gather selected Intent results with their rows
+      intent_facts:
+        ipfabric:
+          host: https://ipfabric.local
+          token: thisIsMyToken
+        intents:
+          - NTP Sources
+        dest: /tmp/intent_rows.jsonl
+"""
+
+RETURN = r"""
+msg:
+  description: Message indicating failure or info about what has happened.
+  returned: always
+  type: str
+data:
+  description:
+    - Result of each intent check with its C(id), C(name), total
+      C(count) and C(checks) counts by color
+      (C(green), C(blue), C(amber), C(red)).
+    - Intent checks whose rows could not be fetched have an C(error).
+  returned: always
+  type: list
+"""
+
+COLORS = {"0": "green", "10": "blue", "20": "amber", "30": "red"}
+
+
+def summarize(intent):
+    result = intent.get("result") or {}
+    checks = result.get("checks") or {}
+    return dict(
+        id=intent["id"],
+        name=intent["name"],
+        count=result.get("count"),
+        checks=dict(
+            (name, checks.get(color, 0)) for color, name in COLORS.items()
+        ),
+    )
+
+
+def get_intents(module, client):
+    resp = client.get(
+        "reports?snapshot={0}".format(module.params["snapshot_id"]),
+    )
+    if resp.status != 200:
+        raise errors.UnexpectedAPIResponse(resp.status, resp.data)
+
+    intents = resp.json
+    selected = module.params["intents"]
+    if selected:
+        intents = [
+            intent
+            for intent in intents
+            if str(intent["id"]) in selected or intent["name"] in selected
+        ]
+        found = set()
+        for intent in intents:
+            found.update((str(intent["id"]), intent["name"]))
+        missing = [name for name in selected if name not in found]
+        if missing:
+            raise errors.IPFabricError(
+                "Intent checks not found: {0}".format(", ".join(missing)),
+            )
+    return intents
+
+
+def fetch_rows(module, client, intent, f, lock):
+    # apiEndpoint is the full table path, e.g. /tables/inventory/devices
+    try:
+        for row in client.iter_table(
+            intent["apiEndpoint"].strip("/").split("/", 1)[1],
+            module.params["detail_columns"],
+            snapshot_id=module.params["snapshot_id"],
+            reports=intent["webEndpoint"],
+            page_size=module.params["page_size"],
+        ):
+            line = json.dumps(dict(intent=intent["id"], row=row))
+            with lock:
+                f.write(line + "\n")
+    except errors.IPFabricError as e:
+        return str(e)
+    return None
+
+
+def write_rows(module, client, intents):
+    dest = module.params["dest"]
+    lock = threading.Lock()
+
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(dest) or ".")
+    try:
+        with os.fdopen(fd, "w") as f:
+            results = ipfabric_utils.run_concurrently(
+                lambda intent: fetch_rows(module, client, intent, f, lock),
+                intents,
+                module.params["max_workers"],
+            )
+    except Exception:
+        os.remove(tmp_path)
+        raise
+    os.replace(tmp_path, dest)
+    return dict(
+        (intent["id"], error)
+        for intent, error in zip(intents, results)
+        if error
+    )
+
+
+def run(module, client):
+    intents = get_intents(module, client)
+    write = bool(module.params["dest"])
+
+    failed = {}
+    if write and not module.check_mode:
+        failed = write_rows(module, client, intents)
+
+    data = []
+    for intent in intents:
+        summary = summarize(intent)
+        if intent["id"] in failed:
+            summary["error"] = failed[intent["id"]]
+        data.append(summary)
+    msg = "Gathered {0} intent checks ({1} failed)".format(
+        len(intents),
+        len(failed),
+    )
+    return write, msg, data
+
+
+def main():
+
+    module = AnsibleModule(
+        argument_spec=dict(
+            ipfabric_utils.get_spec("ipfabric"),
+            snapshot_id=dict(
+                required=False,
+                default="$last",
+                type="str",
+            ),
+            intents=dict(
+                required=False,
+                type="list",
+                elements="str",
+            ),
+            dest=dict(
+                required=False,
+                type="path",
+            ),
+            detail_columns=dict(
+                required=False,
+                default=["sn", "hostname"],
+                type="list",
+                elements="str",
+            ),
+            max_workers=dict(
+                required=False,
+                default=10,
+                type="int",
+            ),
+            page_size=dict(
+                required=False,
+                default=1000,
+                type="int",
+            ),
+        ),
+        supports_check_mode=True,
+    )
+
+    ipfabric_utils.require_positive(module, "max_workers", "page_size")
+
+    try:
+        ipf_client = client.Client(**module.params["ipfabric"])
+        changed, msg, data = run(module, ipf_client)
+        module.exit_json(changed=changed, msg=msg, data=data)
+    except errors.IPFabricError as e:
+        module.fail_json(msg=str(e))
+
+
+if __name__ == "__main__":
+    main()
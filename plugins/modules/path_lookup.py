@@ -0,0 +1,269 @@
+#!/usr/bin/python
+
+from __future__ import absolute_import, division, print_function
+from ansible.module_utils.basic import AnsibleModule
+from ..module_utils import errors
+from ..module_utils import client
+from ..module_utils import ipfabric_utils
+
+__metaclass__ = type
+
+DOCUMENTATION = r"""
+---
+module: path_lookup
+
+short_description: Run a batch of end-to-end Path Lookups within IPFabric
+
+version_added: "0.0.4"
+extends_documentation_fragment:
+  - axiansdeveloper.ipfabric.ipfabric
+
+description:
+  - Run a batch of unicast end-to-end Path Lookups against a Snapshot.
+  - Identical flows are only looked up once and lookups are submitted
+    concurrently.
+
+options:
+  snapshot_id:
+    description: Snapshot ID
+    required: false
+    default: $last
+    type: str
+  flows:
+    description: Flows to look up.
+    required: true
+    type: list
+    elements: dict
+    suboptions:
+      source:
+        description: Source IP address.
+        required: true
+        type: str
+      destination:
+        description: Destination IP address.
+        required: true
+        type: str
+      protocol:
+        description: Protocol of the flow.
+        choices: [ tcp, udp, icmp ]
+        default: tcp
+        type: str
+      source_port:
+        description: Source port or port range, ignored for C(icmp).
+        default: 1024-65535
+        type: str
+      destination_port:
+        description: Destination port or port range, ignored for C(icmp).
+        default: "80"
+        type: str
+  max_workers:
+    description: Maximum number of lookups submitted at once, at least 1.
+    required: false
+    default: 10
+    type: int
+  fail_on_error:
+    description:
+      - Fail when the lookup of any flow fails.
+      - When C(false) failed flows have an C(error) in I(data).
+      - Authentication errors always fail.
+    required: false
+    default: true
+    type: bool
+
+author:
+    - Alex Gittings (@minitriga)
+"""
+
+EXAMPLES = r"""
+- name: "Test IPFabric modules"
+  connection: local
+  hosts: localhost
+  gather_facts: False
+
+  tasks:
+    - name: Check Firewall Flows
+      path_lookup:
+        ipfabric:
+          host: https://ipfabric.local
+          token: thisIsMyToken
+        flows:
+          - source: 10.0.0.1
+            destination: 10.0.1.1
+            destination_port: "443"
+          - source: 10.0.0.1
+            destination: 10.0.1.2
+            protocol: udp
+            destination_port: "53"
+"""
+
+RETURN = r"""
+msg:
+  description: Message indicating failure or info about what has happened.
+  returned: always
+  type: str
+data:
+  description:
+    - Result of each flow, in the order of I(flows).
+    - C(passing_traffic) is one of C(all), C(part) or C(none).
+    - Flows whose lookup failed have an C(error) instead, see
+      I(fail_on_error).
+  returned: always
+  type: list
+"""
+
+FLOW_KEYS = (
+    "source",
+    "destination",
+    "protocol",
+    "source_port",
+    "destination_port",
+)
+
+
+def flow_key(flow):
+    if flow["protocol"] == "icmp":
+        return (flow["source"], flow["destination"], "icmp", None, None)
+    return tuple(flow[key] for key in FLOW_KEYS)
+
+
+def build_payload(snapshot_id, key):
+    source, destination, protocol, source_port, destination_port = key
+    if protocol == "icmp":
+        l4_options = {"type": 8, "code": 0}
+    else:
+        l4_options = {"srcPorts": source_port, "dstPorts": destination_port}
+    return {
+        "parameters": {
+            "type": "pathLookup",
+            "pathLookupType": "unicast",
+            "protocol": protocol,
+            "startingPoint": source,
+            "destinationPoint": destination,
+            "l4Options": l4_options,
+            "networkMode": False,
+            "securedPath": True,
+            "enableRegions": False,
+            "srcRegions": ".*",
+            "dstRegions": ".*",
+            "otherOptions": {"applications": ".*", "tracked": False},
+            "firstHopAlgorithm": {"type": "automatic"},
+            "ttl": 128,
+            "fragmentOffset": 0,
+        },
+        "snapshot": snapshot_id,
+    }
+
+
+def lookup(client, snapshot_id, key):
+    try:
+        resp = client.post("graphs", build_payload(snapshot_id, key))
+    except errors.AuthError:
+        raise
+    except errors.IPFabricError as e:
+        return dict(error=str(e))
+    result = resp.json.get("graphResult", resp.json)
+    pathlookup = result.get("pathlookup", {})
+    return dict(
+        passing_traffic=pathlookup.get("passingTraffic"),
+        events_summary=pathlookup.get("eventsSummary", {}),
+    )
+
+
+def run(module, client):
+    snapshot_id = module.params["snapshot_id"]
+    keys = [flow_key(flow) for flow in module.params["flows"]]
+    unique_keys = list(dict.fromkeys(keys))
+
+    results = ipfabric_utils.run_concurrently(
+        lambda key: lookup(client, snapshot_id, key),
+        unique_keys,
+        module.params["max_workers"],
+    )
+    results = dict(zip(unique_keys, results))
+
+    data = []
+    for key in keys:
+        flow = dict(zip(FLOW_KEYS, key))
+        flow.update(results[key])
+        data.append(flow)
+    failed = [
+        "{0} -> {1}: {2}".format(key[0], key[1], result["error"])
+        for key, result in results.items()
+        if "error" in result
+    ]
+    msg = "Looked up {0} flows ({1} unique, {2} failed)".format(
+        len(keys),
+        len(unique_keys),
+        len(failed),
+    )
+    if failed and module.params["fail_on_error"]:
+        raise errors.IPFabricError("{0}: {1}".format(msg, "; ".join(failed)))
+    return msg, data
+
+
+def main():
+
+    module = AnsibleModule(
+        argument_spec=dict(
+            ipfabric_utils.get_spec("ipfabric"),
+            snapshot_id=dict(
+                required=False,
+                default="$last",
+                type="str",
+            ),
+            flows=dict(
+                required=True,
+                type="list",
+                elements="dict",
+                options=dict(
+                    source=dict(
+                        required=True,
+                        type="str",
+                    ),
+                    destination=dict(
+                        required=True,
+                        type="str",
+                    ),
+                    protocol=dict(
+                        default="tcp",
+                        choices=["tcp", "udp", "icmp"],
+                        type="str",
+                    ),
+                    source_port=dict(
+                        default="1024-65535",
+                        type="str",
+                    ),
+                    destination_port=dict(
+                        default="80",
+                        type="str",
+                    ),
+                ),
+            ),
+            max_workers=dict(
+                required=False,
+                default=10,
+                type="int",
+            ),
+            fail_on_error=dict(
+                required=False,
+                default=True,
+                type="bool",
+            ),
+        ),
+        supports_check_mode=True,
+    )
+
+    ipfabric_utils.require_positive(module, "max_workers")
+
+    result = dict(changed=False, msg="", data=[])
+
+    try:
+        ipf_client = client.Client(**module.params["ipfabric"])
+        result["msg"], result["data"] = run(module, ipf_client)
+        module.exit_json(**result)
+    except errors.IPFabricError as e:
+        module.fail_json(msg=str(e))
+
+
+if __name__ == "__main__":
+    main()
@@ -2,9 +2,14 @@
 
 from __future__ import absolute_import, division, print_function
 from ansible.module_utils.basic import AnsibleModule
+from ansible.module_utils.six import string_types
 from ..module_utils import ipfabric_utils
 from ..module_utils import errors
 from ..module_utils import client
+import json
+import os
+import tempfile
+import time
 
 
 DOCUMENTATION = r"""
@@ -23,7 +28,10 @@ options:
   state:
     description:
       - State of snapshot.
-    choices: [ present, absent, load, unload ]
+      - C(rediscover) plans a partial rediscovery from I(rediscover_rules)
+        and rediscovers the selected devices in I(snapshot_id).
+        In check mode only the plan is returned.
+    choices: [ present, absent, load, unload, rediscover ]
     type: str
   snapshot_id:
     description: Snapshot ID
@@ -41,6 +49,53 @@ options:
       - I(settings) permission is required for API token.
     required: false
     type: list
+  max_loaded:
+    description:
+      - Maximum number of loaded snapshots when I(state=load).
+      - The least recently used snapshots are unloaded to stay within
+        the limit. Locked snapshots are never unloaded.
+      - Snapshots that are still loading count against the limit but
+        are not unloaded.
+    required: false
+    type: int
+  usage_file:
+    description:
+      - JSON file recording when each snapshot was last loaded by
+        this module, used to order snapshots for I(max_loaded).
+      - Snapshots without a record are ordered by the end of their
+        discovery.
+    required: false
+    type: path
+  rediscover_rules:
+    description:
+      - Rules selecting the devices to rediscover when I(state=rediscover).
+      - A device is selected when any rule matches.
+    required: false
+    type: dict
+    suboptions:
+      max_age:
+        description:
+          - Select devices last discovered more than this many seconds ago.
+          - Devices without a discovery time are selected.
+        type: int
+      timestamp_column:
+        description:
+          - Device inventory column holding the last discovery time
+            in milliseconds since the epoch.
+        default: tsDiscoveryEnd
+        type: str
+      task_errors:
+        description:
+          - Select devices whose login IP has a discovery error.
+        default: false
+        type: bool
+      versions:
+        description:
+          - Expected software version by serial number. Select devices
+            whose version differs.
+          - Versions must be strings. Quote them in YAML, as an unquoted
+            C(17.10) is read as the number C(17.1).
+        type: dict
 
 author:
     - Alex Gittings (@minitriga)
@@ -93,6 +148,29 @@ EXAMPLES = r"""
       state: load
       snapshot_id: 91da47aa-4843-4562-a86f-acc0012d63fd
 
+    - name: Load Snapshot keeping at most 3 Snapshots loaded
+      snapshot:
+        ipfabric:
+          host: https://ipfabric.local
+          token: thisIsMyToken
+      state: load
+      snapshot_id: 91da47aa-4843-4562-a86f-acc0012d63fd
+      max_loaded: 3
+      usage_file: /var/lib/ipfabric/snapshot_usage.json
+
+    - name: Rediscover stale or failed Devices in Existing Snapshot
+      snapshot:
+        ipfabric:
+          host: https://ipfabric.local
+          token: thisIsMyToken
+      state: rediscover
+      snapshot_id: 91da47aa-4843-4562-a86f-acc0012d63fd
+      rediscover_rules:
+        max_age: 86400
+        task_errors: true
+        versions:
+          ABCDE1234: 17.3.4
+
     - name: Unload loaded Snapshot
       snapshot:
         ipfabric:
@@ -153,9 +231,196 @@ def ensure_loaded(module, client):
         )
 
 
+def read_usage(path):
+    if path and os.path.exists(path):
+        with open(path) as f:
+            try:
+                return json.load(f)
+            except ValueError as e:
+                raise errors.IPFabricError(
+                    "Invalid usage_file {0}: {1}".format(path, e),
+                )
+    return {}
+
+
+def record_usage(path, snapshot_id):
+    # Several jobs may share the file: re-read it just before writing to
+    # keep their records, and replace it atomically so a reader never sees
+    # a partial write.
+    if not path:
+        return
+    usage = read_usage(path)
+    usage[snapshot_id] = time.time()
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path) or ".")
+    with os.fdopen(fd, "w") as f:
+        json.dump(usage, f)
+    os.replace(tmp_path, path)
+
+
+def last_used(snapshot, usage):
+    return usage.get(snapshot["id"], (snapshot.get("tsEnd") or 0) / 1000.0)
+
+
+def plan_unloads(snapshots, snapshot_id, max_loaded, usage):
+    # Returns the snapshots to unload, least recently used first, and
+    # whether the budget can be met at all.
+    loaded = [
+        s
+        for s in snapshots
+        if s["state"] in ("loaded", "loading") and s["id"] != snapshot_id
+    ]
+    evictable = sorted(
+        [s for s in loaded if s["state"] == "loaded" and not s.get("locked")],
+        key=lambda s: last_used(s, usage),
+    )
+    excess = max(len(loaded) - (max_loaded - 1), 0)
+    unloads = [s["id"] for s in evictable[:excess]]
+    return unloads, excess <= len(evictable)
+
+
+def ensure_loaded_within_budget(module, client):
+    snapshot_id = module.params["snapshot_id"]
+    max_loaded = module.params["max_loaded"]
+    usage_file = module.params["usage_file"]
+
+    if max_loaded < 1:
+        raise errors.IPFabricError("max_loaded must be at least 1.")
+
+    usage = read_usage(usage_file)
+    snapshots = client.get_snapshots()
+    target = [s for s in snapshots if s["id"] == snapshot_id]
+    if not target:
+        raise errors.IPFabricError("Snapshot not found.")
+
+    unloads, within_budget = plan_unloads(
+        snapshots,
+        snapshot_id,
+        max_loaded,
+        usage,
+    )
+    if not within_budget:
+        module.warn(
+            "Locked or loading snapshots prevent staying within {0} "
+            "loaded snapshots.".format(max_loaded),
+        )
+
+    actions = [(unload_id, "unload") for unload_id in unloads]
+    if target[0]["state"] == "unloaded":
+        actions.append((snapshot_id, "load"))
+
+    if actions and not module.check_mode:
+        ipfabric_utils.run_concurrently(
+            lambda action: client.snapshot_load(
+                action[0],
+                action[1],
+                check_exists=False,
+            ),
+            actions,
+            len(actions),
+        )
+
+    if not module.check_mode:
+        record_usage(usage_file, snapshot_id)
+
+    data = [dict(id=action[0], state=action[1]) for action in actions]
+    msg = "Snapshot {0} loaded, {1} snapshots unloaded".format(
+        snapshot_id,
+        len(unloads),
+    )
+    return bool(actions), msg, data
+
+
+def plan_rediscovery(module, client):
+    snapshot_id = module.params["snapshot_id"]
+    rules = module.params["rediscover_rules"] or {}
+    timestamp_column = rules.get("timestamp_column") or "tsDiscoveryEnd"
+    versions = rules.get("versions") or {}
+    # YAML reads unquoted versions such as 17.10 as numbers, and 17.1 can
+    # no longer be told apart from 17.10.
+    unquoted = sorted(
+        str(sn)
+        for sn, version in versions.items()
+        if not isinstance(version, string_types)
+    )
+    if unquoted:
+        raise errors.IPFabricError(
+            "Versions must be quoted strings, check the versions of: "
+            "{0}".format(", ".join(unquoted)),
+        )
+    versions = dict((str(sn), version) for sn, version in versions.items())
+    columns = ["sn", "hostname", "loginIp", "version"]
+    cutoff = None
+    if rules.get("max_age") is not None:
+        columns.append(timestamp_column)
+        cutoff = (time.time() - rules["max_age"]) * 1000
+
+    failed_ips = set()
+    if rules.get("task_errors"):
+        failed_ips = set(
+            row["ip"]
+            for row in client.iter_table(
+                "reports/discovery-errors",
+                ["ip"],
+                snapshot_id=snapshot_id,
+            )
+        )
+
+    plan = []
+    for device in client.iter_table(
+        "inventory/devices",
+        columns,
+        snapshot_id=snapshot_id,
+    ):
+        reasons = []
+        if cutoff is not None and (device.get(timestamp_column) or 0) < cutoff:
+            reasons.append("stale")
+        if device.get("loginIp") in failed_ips:
+            reasons.append("task_error")
+        expected = versions.get(device["sn"])
+        if expected is not None and expected != str(device.get("version")):
+            reasons.append("version")
+        if reasons:
+            plan.append(
+                dict(
+                    sn=device["sn"],
+                    hostname=device["hostname"],
+                    reasons=reasons,
+                ),
+            )
+    return plan
+
+
+def ensure_rediscovered(module, client):
+    snapshot_id = module.params["snapshot_id"]
+    plan = plan_rediscovery(module, client)
+    if not plan:
+        return False, "No devices require rediscovery.", plan
+
+    if not module.check_mode:
+        resp = client.rediscover_existing_snapshot(
+            snapshot_id,
+            [device["sn"] for device in plan],
+        )
+        if resp.status not in (200, 201, 204):
+            raise errors.UnexpectedAPIResponse(resp.status, resp.data)
+
+    msg = "Rediscovering {0} devices in snapshot {1}".format(
+        len(plan),
+        snapshot_id,
+    )
+    return True, msg, plan
+
+
 def run(module, client):
     if module.params["state"] == "absent":
         return ensure_absent(module, client)
+    elif module.params["state"] == "rediscover":
+        return ensure_rediscovered(module, client)
+    elif (
+        module.params["state"] == "load"
+        and module.params["max_loaded"] is not None
+    ):
+        return ensure_loaded_within_budget(module, client)
     elif module.params["state"] in ["load", "unload"]:
         return ensure_loaded(module, client)
     return ensure_present(module, client)
@@ -172,7 +437,7 @@ def main():
             state=dict(
                 required=False,
                 default="present",
-                choices=["present", "absent", "load", "unload"],
+                choices=["present", "absent", "load", "unload", "rediscover"],
                 type="str",
             ),
             devices=dict(
@@ -183,12 +448,41 @@ def main():
                 required=False,
                 type="list",
             ),
+            max_loaded=dict(
+                required=False,
+                type="int",
+            ),
+            usage_file=dict(
+                required=False,
+                type="path",
+            ),
+            rediscover_rules=dict(
+                required=False,
+                type="dict",
+                options=dict(
+                    max_age=dict(
+                        type="int",
+                    ),
+                    timestamp_column=dict(
+                        default="tsDiscoveryEnd",
+                        type="str",
+                    ),
+                    task_errors=dict(
+                        default=False,
+                        type="bool",
+                    ),
+                    versions=dict(
+                        type="dict",
+                    ),
+                ),
+            ),
         ),
         supports_check_mode=True,
         required_if=[
             ("state", "absent", ["snapshot_id"]),
             ("state", "load", ["snapshot_id"]),
             ("state", "unload", ["snapshot_id"]),
+            ("state", "rediscover", ["snapshot_id", "rediscover_rules"]),
         ],
     )
 
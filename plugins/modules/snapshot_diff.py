@@ -0,0 +1,319 @@
+#!/usr/bin/python
+
+from __future__ import absolute_import, division, print_function
+from ansible.module_utils.basic import AnsibleModule
+from ..module_utils import errors
+from ..module_utils import client
+from ..module_utils import ipfabric_utils
+import hashlib
+import json
+
+__metaclass__ = type
+
+DOCUMENTATION = r"""
+---
+module: snapshot_diff
+
+short_description: Compare a table between two Snapshots within IPFabric
+
+version_added: "0.0.4"
+extends_documentation_fragment:
+  - axiansdeveloper.ipfabric.ipfabric
+
+description:
+  - Compare a table between two Snapshots within IPFabric.
+  - Both tables are streamed page by page, rows are indexed by I(key)
+    and compared by a hash of their content.
+  - Only added, removed and changed rows are returned.
+
+options:
+  snapshot_id:
+    description: Snapshot ID used as the base of the comparison.
+    required: false
+    default: $prev
+    type: str
+  compare_snapshot_id:
+    description: Snapshot ID compared against I(snapshot_id).
+    required: false
+    default: $last
+    type: str
+  table:
+    description: Table to compare, relative to C(tables/).
+    required: false
+    default: inventory/devices
+    type: str
+  columns:
+    description: Columns of I(table) to compare.
+    required: false
+    default:
+      - loginIp
+      - family
+      - hostname
+      - platform
+      - loginType
+      - sn
+      - siteName
+      - vendor
+      - version
+    type: list
+    elements: str
+  key:
+    description:
+      - Columns identifying a row in both snapshots.
+      - All key columns must be listed in I(columns).
+      - Both tables are sorted by the first key column. Rows sharing a
+        value that spans a page boundary are fetched again, filtered on
+        that value and sorted by the next key column.
+      - The comparison fails if a key identifies more than one row.
+    required: false
+    default: [ sn ]
+    type: list
+    elements: str
+  page_size:
+    description: Number of rows fetched per request, at least 1.
+    required: false
+    default: 1000
+    type: int
+
+author:
+    - Alex Gittings (@minitriga)
+"""
+
+EXAMPLES = r"""
+- name: "Test IPFabric modules"
+  connection: local
+  hosts: localhost
+  gather_facts: False
+
+  tasks:
+    - name: Compare devices between the last two snapshots
+      snapshot_diff:
+        ipfabric:
+          host: https://ipfabric.local
+          token: thisIsMyToken
+
+    - name: Compare interfaces between two snapshots
+      snapshot_diff:
+        ipfabric:
+          host: https://ipfabric.local
+          token: thisIsMyToken
+        snapshot_id: 91da47aa-4843-4562-a86f-acc0012d63fd
+        compare_snapshot_id: $last
+        table: inventory/interfaces
+        columns:
+          - sn
+          - intName
+          - l1
+          - l2
+        key:
+          - sn
+          - intName
+"""
+
+RETURN = r"""
+msg:
+  description: Message indicating failure or info about what has happened.
+  returned: always
+  type: str
+data:
+  description: Data returned from the module.
+  returned: always
+  type: dict
+  contains:
+    added:
+      description: Rows only present in I(compare_snapshot_id).
+      type: list
+    removed:
+      description: Rows only present in I(snapshot_id).
+      type: list
+    changed:
+      description: Rows present in both snapshots with different content.
+      type: list
+"""
+
+
+def row_key(row, key):
+    return tuple(row.get(column) for column in key)
+
+
+def row_hash(row):
+    content = json.dumps(row, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha1(content.encode("utf-8")).hexdigest()
+
+
+def iter_groups(rows, column, page_size):
+    # Yields runs of rows sharing the value of column, and whether the run
+    # crosses a page boundary.
+    group = []
+    crosses_page = False
+    for index, row in enumerate(rows):
+        if group and row.get(column) != group[0].get(column):
+            yield group, crosses_page
+            group = []
+            crosses_page = False
+        elif group and index % page_size == 0:
+            crosses_page = True
+        group.append(row)
+    if group:
+        yield group, crosses_page
+
+
+def iter_rows(module, client, snapshot_id, filters=None, depth=0):
+    # Offset paging is only stable between rows with different sort
+    # values. The API may return rows sharing a value in a different order
+    # for each page, so a run of equal values crossing a page boundary can
+    # repeat or lose rows. Such a run is fetched again on its own, sorted
+    # by the next key column. On the last key column a run of equal values
+    # is a duplicate key, which diff_table reports.
+    key = module.params["key"]
+    column = key[depth]
+    rows = client.iter_table(
+        module.params["table"],
+        module.params["columns"],
+        snapshot_id=snapshot_id,
+        filters=filters,
+        sort={"order": "asc", "column": column},
+        page_size=module.params["page_size"],
+    )
+
+    for group, crosses_page in iter_groups(
+        rows,
+        column,
+        module.params["page_size"],
+    ):
+        if crosses_page and depth + 1 < len(key):
+            group_filters = dict(filters or {})
+            group_filters[column] = ["eq", group[0].get(column)]
+            group = iter_rows(
+                module,
+                client,
+                snapshot_id,
+                group_filters,
+                depth + 1,
+            )
+        for row in group:
+            yield row
+
+
+def duplicate_key(key, snapshot_id):
+    return errors.IPFabricError(
+        "Key {0} identifies more than one row in snapshot {1}.".format(
+            list(key),
+            snapshot_id,
+        ),
+    )
+
+
+def diff_table(module, client):
+    key = module.params["key"]
+    snapshot_id = module.params["snapshot_id"]
+    compare_snapshot_id = module.params["compare_snapshot_id"]
+
+    index = {}
+    for row in iter_rows(module, client, snapshot_id):
+        k = row_key(row, key)
+        if k in index:
+            raise duplicate_key(k, snapshot_id)
+        index[k] = (row_hash(row), row)
+
+    seen = set()
+    added = []
+    changed = []
+    for row in iter_rows(module, client, compare_snapshot_id):
+        k = row_key(row, key)
+        if k in seen:
+            raise duplicate_key(k, compare_snapshot_id)
+        seen.add(k)
+
+        before = index.pop(k, None)
+        if before is None:
+            added.append(row)
+        elif before[0] != row_hash(row):
+            changed.append(dict(before=before[1], after=row))
+
+    removed = [row for digest, row in index.values()]
+    return dict(added=added, removed=removed, changed=changed)
+
+
+def main():
+
+    module = AnsibleModule(
+        argument_spec=dict(
+            ipfabric_utils.get_spec("ipfabric"),
+            snapshot_id=dict(
+                required=False,
+                default="$prev",
+                type="str",
+            ),
+            compare_snapshot_id=dict(
+                required=False,
+                default="$last",
+                type="str",
+            ),
+            table=dict(
+                required=False,
+                default="inventory/devices",
+                type="str",
+            ),
+            columns=dict(
+                required=False,
+                default=[
+                    "loginIp",
+                    "family",
+                    "hostname",
+                    "platform",
+                    "loginType",
+                    "sn",
+                    "siteName",
+                    "vendor",
+                    "version",
+                ],
+                type="list",
+                elements="str",
+            ),
+            key=dict(
+                required=False,
+                default=["sn"],
+                type="list",
+                elements="str",
+            ),
+            page_size=dict(
+                required=False,
+                default=1000,
+                type="int",
+            ),
+        ),
+        supports_check_mode=True,
+    )
+
+    ipfabric_utils.require_positive(module, "page_size")
+
+    if not module.params["key"]:
+        module.fail_json(msg="key must list at least one column.")
+
+    missing = set(module.params["key"]) - set(module.params["columns"])
+    if missing:
+        module.fail_json(
+            msg="Key columns missing from columns: {0}".format(
+                ", ".join(sorted(missing)),
+            ),
+        )
+
+    result = dict(changed=False, msg="", data={})
+
+    try:
+        ipf_client = client.Client(**module.params["ipfabric"])
+        data = diff_table(module, ipf_client)
+        result["data"] = data
+        result["msg"] = "{0} added, {1} removed, {2} changed".format(
+            len(data["added"]),
+            len(data["removed"]),
+            len(data["changed"]),
+        )
+        module.exit_json(**result)
+    except errors.IPFabricError as e:
+        module.fail_json(msg=str(e))
+
+
+if __name__ == "__main__":
+    main()
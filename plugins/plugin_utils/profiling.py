@@ -0,0 +1,138 @@
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+import cProfile
+import os
+import platform
+import pstats
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+from ansible.module_utils.ansible_release import __version__ as ansible_version
+
+TOP_FUNCTIONS = 10
+# Only calls into the collection's own plugins are counted, the calls made
+# inside ansible-core and Jinja2 change between their releases.
+PLUGINS_DIR = os.path.dirname(
+    os.path.dirname(os.path.realpath(__file__)),
+) + os.sep
+
+
+def own_calls(stats):
+    return sum(
+        stat[1]
+        for func, stat in stats.stats.items()
+        if os.path.realpath(func[0]).startswith(PLUGINS_DIR)
+    )
+
+
+class Profiler:
+    def __init__(self):
+        self.devices = 0
+        self._phases = {}
+        # Without reset_peak() (Python 3.9+) the peak covers everything
+        # traced since start(), so peak memory is not reported.
+        self._track_peak = hasattr(tracemalloc, "reset_peak")
+
+    def start(self):
+        tracemalloc.start()
+
+    def stop(self):
+        tracemalloc.stop()
+
+    @contextmanager
+    def phase(self, name):
+        if name not in self._phases:
+            self._phases[name] = dict(
+                time=0.0,
+                calls=0,
+                peak_memory=0,
+                profile=cProfile.Profile(),
+            )
+        phase = self._phases[name]
+
+        if self._track_peak:
+            tracemalloc.reset_peak()
+        current = tracemalloc.get_traced_memory()[0]
+        started = time.perf_counter()
+        phase["profile"].enable()
+        try:
+            yield
+        finally:
+            phase["profile"].disable()
+            phase["time"] += time.perf_counter() - started
+            phase["calls"] += 1
+            phase["peak_memory"] = max(
+                phase["peak_memory"],
+                tracemalloc.get_traced_memory()[1] - current,
+            )
+
+    def report(self):
+        devices = self.devices or 1
+        phases = {}
+        for name, phase in self._phases.items():
+            stats = pstats.Stats(phase["profile"])
+            top = sorted(
+                stats.stats.items(),
+                key=lambda item: item[1][3],
+                reverse=True,
+            )[:TOP_FUNCTIONS]
+            phases[name] = dict(
+                time=phase["time"],
+                calls=phase["calls"],
+                peak_memory=(
+                    phase["peak_memory"] if self._track_peak else None
+                ),
+                time_per_device=phase["time"] / devices,
+                function_calls_per_device=own_calls(stats) / devices,
+                top_functions=[
+                    dict(
+                        function="{0}:{1}({2})".format(*func),
+                        calls=stat[1],
+                        cumulative_time=stat[3],
+                    )
+                    for func, stat in top
+                ],
+            )
+        return dict(
+            devices=self.devices,
+            versions=versions(),
+            phases=phases,
+        )
+
+
+def versions():
+    return dict(python=platform.python_version(), ansible=ansible_version)
+
+
+def compare_reports(report, baseline, tolerance):
+    # Wall-clock time depends on the machine the baseline was recorded on,
+    # so only function calls per device and peak memory are compared. Peak
+    # memory depends on the interpreter and ansible-core, it is skipped when
+    # either differs from the baseline.
+    metrics = ["function_calls_per_device"]
+    if report.get("versions") == baseline.get("versions"):
+        metrics.append("peak_memory")
+
+    regressions = []
+    for name, expected in baseline["phases"].items():
+        actual = report["phases"].get(name)
+        if actual is None:
+            continue
+        for metric in metrics:
+            if expected[metric] is None or actual[metric] is None:
+                continue
+            limit = expected[metric] * (1 + tolerance)
+            if actual[metric] > limit:
+                regressions.append(
+                    "{0} {1}: {2} > {3} (baseline {4})".format(
+                        name,
+                        metric,
+                        actual[metric],
+                        limit,
+                        expected[metric],
+                    ),
+                )
+    return regressions
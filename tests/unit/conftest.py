@@ -0,0 +1,172 @@
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+import os
+import sys
+
+try:
+    from ansible.plugins.loader import init_plugin_loader
+except ImportError:
+    init_plugin_loader = None
+
+# The collection finder must be installed before any test imports from
+# ansible_collections, otherwise plugins of this collection cannot be
+# loaded by name. ansible-test units installs it already.
+if init_plugin_loader is not None:
+    init_plugin_loader(
+        [
+            path
+            for path in sys.path
+            if os.path.isdir(os.path.join(path, "ansible_collections"))
+        ],
+    )
+
+import pytest  # noqa: E402
+
+from ansible_collections.axiansdeveloper.ipfabric.plugins.module_utils import (  # noqa: E402,E501
+    errors,
+)
+
+
+class FakeModule:
+    def __init__(self, params, check_mode=False):
+        self.params = params
+        self.check_mode = check_mode
+        self.warnings = []
+
+    def warn(self, msg):
+        self.warnings.append(msg)
+
+
+class FakeResponse:
+    def __init__(self, status, json=None, data=""):
+        self.status = status
+        self.json = json
+        self.data = data
+
+
+def matches(row, filters):
+    # Supports {column: ["eq", value], ...} and the same conditions
+    # joined by {"or": [...]}.
+    if not filters:
+        return True
+    if "or" in filters:
+        return any(matches(row, condition) for condition in filters["or"])
+    return all(
+        row.get(column) == value
+        for column, (operator, value) in filters.items()
+    )
+
+
+# In-memory Client. tables maps a table path to its rows, or to a dict of
+# rows per snapshot ID. Unknown tables fail like the API does. Like the
+# API, rows sharing the sort value are not returned in the same order by
+# every page request.
+class FakeClient:
+    def __init__(self, tables=None, snapshots=None, responses=None):
+        self.tables = tables or {}
+        self.snapshots = snapshots or []
+        self.responses = responses or {}
+        self.calls = []
+        self.loads = []
+        self.downloads = []
+        self.failing_downloads = set()
+        self.rediscovered = None
+
+    def iter_table(
+        self,
+        path,
+        columns,
+        snapshot_id=None,
+        filters=None,
+        sort=None,
+        page_size=1000,
+        **kwargs
+    ):
+        self.calls.append(
+            dict(
+                path=path,
+                snapshot_id=snapshot_id,
+                filters=filters,
+                sort=sort,
+                page_size=page_size,
+                **kwargs
+            ),
+        )
+        if path not in self.tables:
+            raise errors.UnexpectedAPIResponse(422, "unknown table")
+        rows = self.tables[path]
+        if isinstance(rows, dict):
+            rows = rows[snapshot_id]
+        rows = [
+            dict((column, row.get(column)) for column in columns)
+            for row in rows
+            if matches(row, filters)
+        ]
+        return self._pages(rows, sort, page_size)
+
+    def _pages(self, rows, sort, page_size):
+        start = 0
+        while True:
+            ordered = rows
+            if sort:
+                if (start // page_size) % 2:
+                    ordered = list(reversed(rows))
+                ordered = sorted(
+                    ordered,
+                    key=lambda row: row[sort["column"]],
+                    reverse=sort["order"] == "desc",
+                )
+            page = ordered[start:start + page_size]
+            for row in page:
+                yield row
+            if len(page) < page_size:
+                return
+            start += page_size
+
+    def get(self, path):
+        return FakeResponse(200, self.responses[path])
+
+    def post(self, path, data):
+        # A callable response is called with the request data and may
+        # raise to simulate a failing request.
+        self.calls.append(dict(path=path, data=data))
+        response = self.responses[path]
+        if callable(response):
+            response = response(data)
+        return FakeResponse(200, response)
+
+    def get_snapshots(self):
+        return self.snapshots
+
+    def snapshot_load(self, snapshot_id, state, check_exists=True):
+        assert not check_exists
+        self.loads.append((snapshot_id, state))
+
+    def rediscover_existing_snapshot(self, snapshot_id, devices):
+        self.rediscovered = devices
+        return FakeResponse(200)
+
+    def download(self, path, fileobj, chunk_size=None):
+        if any(digest in path for digest in self.failing_downloads):
+            raise errors.UnexpectedAPIResponse(500, "download failed")
+        self.downloads.append(path)
+        fileobj.write(path.encode("utf-8"))
+
+
+@pytest.fixture
+def make_module(request):
+    # Parameters default to the PARAMS of the requesting test module.
+    def make(check_mode=False, **params):
+        return FakeModule(
+            dict(request.module.PARAMS, **params),
+            check_mode=check_mode,
+        )
+
+    return make
+
+
+@pytest.fixture
+def make_client():
+    return FakeClient
@@ -0,0 +1,175 @@
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+import json
+import os
+
+import pytest
+import yaml
+from ansible.errors import AnsibleError
+from ansible.inventory.data import InventoryData
+from ansible.parsing.dataloader import DataLoader
+from ansible.plugins.inventory import Constructable
+from ansible.plugins.loader import inventory_loader
+
+try:
+    from ansible.template import trust_as_template as trust
+except ImportError:
+    # Templates are only tagged as trusted from ansible-core 2.19.
+    def trust(template):
+        return template
+
+
+PROFILING = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)),
+    "..",
+    "..",
+    "..",
+    "profiling",
+)
+FIXTURES = os.path.join(PROFILING, "fixtures")
+
+with open(os.path.join(FIXTURES, "tables_inventory_devices.json")) as f:
+    DEVICES = json.load(f)["data"]
+
+
+def load(tmp_path, **options):
+    config = dict(
+        plugin="axiansdeveloper.ipfabric.inventory",
+        api_endpoint="https://ipfabric.local/api/v1",
+        token="replay",
+        profile_replay_dir=FIXTURES,
+    )
+    config.update(options)
+    path = tmp_path / "ipfabric.yml"
+    path.write_text(json.dumps(config))
+
+    inventory = InventoryData()
+    plugin = inventory_loader.get("axiansdeveloper.ipfabric.inventory")
+    plugin.parse(inventory, DataLoader(), str(path), cache=False)
+    return plugin, inventory
+
+
+def parse(tmp_path, **options):
+    return load(tmp_path, **options)[1]
+
+
+def hosts(inventory, group):
+    return sorted(host.name for host in inventory.groups[group].get_hosts())
+
+
+def test_constructed_groups_and_hostvars(tmp_path):
+    inventory = parse(
+        tmp_path,
+        compose=dict(os_version="version", site="siteName | lower"),
+        groups=dict(cisco='vendor == "cisco"'),
+        keyed_groups=[dict(key="platform", prefix="platform")],
+    )
+
+    for device in DEVICES:
+        host_vars = inventory.get_host(device["hostname"]).vars
+        assert host_vars["ansible_host"] == device["loginIp"]
+        assert host_vars["os_version"] == device["version"]
+        assert host_vars["site"] == device["siteName"].lower()
+
+    assert hosts(inventory, "cisco") == sorted(
+        device["hostname"] for device in DEVICES if device["vendor"] == "cisco"
+    )
+    for platform in set(device["platform"] for device in DEVICES):
+        group = "platform_" + platform.replace("-", "_")
+        assert hosts(inventory, group) == sorted(
+            device["hostname"]
+            for device in DEVICES
+            if device["platform"] == platform
+        )
+
+
+def test_compose_evaluates_distinct_values_once(tmp_path, monkeypatch):
+    evaluated = []
+    compose = Constructable._compose
+
+    def counting_compose(self, template, variables, *args, **kwargs):
+        evaluated.append(template)
+        return compose(self, template, variables, *args, **kwargs)
+
+    monkeypatch.setattr(Constructable, "_compose", counting_compose)
+    parse(
+        tmp_path,
+        compose=dict(upper_vendor="vendor | upper"),
+        keyed_groups=[dict(key="platform", prefix="platform")],
+    )
+
+    assert evaluated.count("vendor | upper") == len(
+        set(device["vendor"] for device in DEVICES),
+    )
+    assert evaluated.count("platform") == len(
+        set(device["platform"] for device in DEVICES),
+    )
+
+
+def test_compose_undefined_strict(tmp_path):
+    with pytest.raises(AnsibleError, match="does_not_exist"):
+        parse(tmp_path, compose=dict(x="does_not_exist"), strict=True)
+
+
+def test_compose_undefined_not_strict(tmp_path):
+    inventory = parse(tmp_path, compose=dict(x="does_not_exist"))
+
+    assert "x" not in inventory.get_host(DEVICES[0]["hostname"]).vars
+
+
+def test_groups_see_host_vars_without_compose(tmp_path):
+    inventory = parse(
+        tmp_path,
+        groups=dict(cis="inventory_hostname.startswith('cis')"),
+        keyed_groups=[dict(key="inventory_hostname[:3]", prefix="pre")],
+    )
+
+    assert hosts(inventory, "cis") == sorted(
+        device["hostname"]
+        for device in DEVICES
+        if device["hostname"].startswith("cis")
+    )
+    assert hosts(inventory, "cis")
+    for device in DEVICES:
+        assert device["hostname"] in hosts(
+            inventory,
+            "pre_" + device["hostname"][:3],
+        )
+
+
+def test_compose_cache_distinguishes_types(tmp_path):
+    plugin, inventory = load(tmp_path, compose=dict(x="vendor"))
+
+    results = [
+        plugin._compose(trust("value | string"), dict(value=value))
+        for value in (True, 1, 1.0)
+    ]
+
+    assert results == ["True", "1", "1.0"]
+
+
+def test_profiling_baseline(tmp_path):
+    # The regression gate of tests/profiling/inventory.yml: fails when the
+    # replayed run regresses against the shipped baseline.
+    with open(os.path.join(PROFILING, "inventory.yml")) as f:
+        config = yaml.safe_load(f)
+    output = tmp_path / "profile.json"
+    config.update(
+        profile_output=str(output),
+        profile_baseline=os.path.join(PROFILING, "baseline.json"),
+        profile_replay_dir=FIXTURES,
+    )
+
+    parse(tmp_path, **config)
+
+    report = json.loads(output.read_text())
+    assert report["devices"] == len(DEVICES)
+    assert sorted(report["phases"]) == [
+        "add_device_to_groups",
+        "constructed",
+        "decode",
+        "fetch",
+        "set_variable",
+    ]
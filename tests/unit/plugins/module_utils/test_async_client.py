@@ -0,0 +1,165 @@
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+import asyncio
+import json
+
+import pytest
+
+from ansible_collections.axiansdeveloper.ipfabric.plugins.module_utils import (
+    async_client,
+    errors,
+)
+
+pytestmark = pytest.mark.skipif(
+    not async_client.HAS_AIOHTTP,
+    reason="aiohttp is not installed",
+)
+
+
+class RawResponse:
+    def __init__(self, status, body, reason="OK"):
+        self.status = status
+        self.reason = reason
+        self.headers = {}
+        self.body = json.dumps(body).encode("utf-8")
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        pass
+
+    async def read(self):
+        # Yield to the event loop like a real read would.
+        await asyncio.sleep(0)
+        return self.body
+
+
+class Session:
+    def __init__(self, respond):
+        self.respond = respond
+        self.requests = []
+
+    def request(self, method, path, data=None, headers=None):
+        payload = json.loads(data) if data else None
+        self.requests.append((method, path, payload))
+        return RawResponse(*self.respond(payload))
+
+    async def close(self):
+        pass
+
+
+def client(respond, **kwargs):
+    ipf_client = async_client.AsyncClient(
+        "https://ipfabric.local",
+        "token",
+        **kwargs
+    )
+    ipf_client._session = Session(respond)
+    return ipf_client
+
+
+def collect(ipf_client, *args, **kwargs):
+    async def run():
+        return [row async for row in ipf_client.iter_table(*args, **kwargs)]
+
+    return asyncio.run(run())
+
+
+@pytest.mark.parametrize("status", [401, 403])
+def test_auth_errors(status):
+    ipf_client = client(lambda payload: (status, {}, "Denied"))
+
+    with pytest.raises(errors.AuthError):
+        asyncio.run(ipf_client.get_snapshots())
+
+
+def test_unexpected_status():
+    ipf_client = client(lambda payload: (500, {}))
+
+    with pytest.raises(errors.UnexpectedAPIResponse):
+        collect(ipf_client, "inventory/devices", ["sn"])
+
+
+def test_iter_table_fans_out_pages():
+    rows = [dict(sn=str(i)) for i in range(25)]
+
+    def respond(payload):
+        start = payload["pagination"]["start"]
+        limit = payload["pagination"]["limit"]
+        page = rows[start:start + limit]
+        return 200, dict(data=page, _meta=dict(count=len(rows)))
+
+    ipf_client = client(respond, max_concurrency=2)
+
+    result = collect(
+        ipf_client,
+        "inventory/devices",
+        ["sn"],
+        snapshot_id="$last",
+        page_size=10,
+    )
+
+    assert result == rows
+    requests = ipf_client._session.requests
+    assert [payload["pagination"]["start"] for m, p, payload in requests] == [
+        0,
+        10,
+        20,
+    ]
+    assert all(payload["snapshot"] == "$last" for m, p, payload in requests)
+    assert requests[0][1] == (
+        "https://ipfabric.local/api/v1/tables/inventory/devices"
+    )
+
+
+def test_iter_table_without_count_pages_in_turn():
+    rows = [dict(sn=str(i)) for i in range(20)]
+
+    def respond(payload):
+        start = payload["pagination"]["start"]
+        limit = payload["pagination"]["limit"]
+        return 200, dict(data=rows[start:start + limit])
+
+    ipf_client = client(respond)
+
+    assert collect(ipf_client, "inventory/devices", ["sn"], page_size=10) == (
+        rows
+    )
+    assert len(ipf_client._session.requests) == 3
+
+
+def test_iter_table_rejects_page_size_below_one():
+    ipf_client = client(lambda payload: (200, dict(data=[])))
+
+    with pytest.raises(errors.IPFabricError, match="page_size"):
+        collect(ipf_client, "inventory/devices", ["sn"], page_size=0)
+
+
+def test_client_reusable_after_close():
+    rows = [dict(sn=str(i)) for i in range(3)]
+
+    def respond(payload):
+        start = payload["pagination"]["start"]
+        return 200, dict(data=rows[start:start + 1], _meta=dict(count=3))
+
+    # A single slot makes the pages wait on the semaphore, binding it to
+    # the running event loop.
+    ipf_client = client(respond, max_concurrency=1)
+
+    async def run():
+        async with ipf_client:
+            ipf_client._session = Session(respond)
+            return [
+                row
+                async for row in ipf_client.iter_table(
+                    "inventory/devices",
+                    ["sn"],
+                    page_size=1,
+                )
+            ]
+
+    assert asyncio.run(run()) == rows
+    assert asyncio.run(run()) == rows
@@ -0,0 +1,61 @@
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+import pytest
+
+from ansible_collections.axiansdeveloper.ipfabric.plugins.module_utils import (
+    client,
+    errors,
+)
+
+
+@pytest.fixture
+def ipf_client(monkeypatch):
+    monkeypatch.setattr(client.time, "sleep", lambda seconds: None)
+    return client.Client("https://ipfabric.local", "token")
+
+
+def test_create_snapshot_waits_for_discovery(ipf_client, monkeypatch):
+    states = iter(["done", "done", "discovering", "done"])
+    monkeypatch.setattr(
+        ipf_client,
+        "request",
+        lambda method, path, data=None: client.Response(200, '{"success": 1}'),
+    )
+    monkeypatch.setattr(
+        ipf_client,
+        "get_snapshots",
+        lambda: [dict(id="new", state=next(states))],
+    )
+
+    assert ipf_client.create_snapshot() == dict(id="new", state="discovering")
+
+
+def test_create_snapshot_gives_up_after_ten_polls(ipf_client, monkeypatch):
+    polls = []
+    monkeypatch.setattr(
+        ipf_client,
+        "request",
+        lambda method, path, data=None: client.Response(200, '{"success": 1}'),
+    )
+
+    def get_snapshots():
+        polls.append(None)
+        return [dict(id="new", state="done")]
+
+    monkeypatch.setattr(ipf_client, "get_snapshots", get_snapshots)
+
+    assert ipf_client.create_snapshot()["state"] == "done"
+    assert len(polls) == 11
+
+
+def test_create_snapshot_failure(ipf_client, monkeypatch):
+    monkeypatch.setattr(
+        ipf_client,
+        "request",
+        lambda method, path, data=None: client.Response(500, "{}"),
+    )
+
+    with pytest.raises(errors.IPFabricError, match="Failed"):
+        ipf_client.create_snapshot()
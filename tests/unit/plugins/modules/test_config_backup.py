@@ -0,0 +1,226 @@
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+import json
+
+import pytest
+
+from ansible_collections.axiansdeveloper.ipfabric.plugins.module_utils import (
+    errors,
+)
+from ansible_collections.axiansdeveloper.ipfabric.plugins.modules import (
+    config_backup,
+)
+
+
+PARAMS = dict(
+    dest=None,
+    snapshot_id=None,
+    max_workers=2,
+    page_size=1000,
+)
+
+
+def config(sn, digest="h1", last_change=0):
+    return dict(
+        sn=sn,
+        hostname=sn.lower(),
+        hash=digest,
+        lastChange=last_change,
+    )
+
+
+def test_latest_configs_filters_by_snapshot_serials(
+    monkeypatch,
+    make_module,
+    make_client,
+):
+    monkeypatch.setattr(config_backup, "FILTER_CHUNK_SIZE", 2)
+    client = make_client(
+        tables={
+            "inventory/devices": [dict(sn="A"), dict(sn="B"), dict(sn="C")],
+            "management/configuration": [
+                config("A", "new", 2),
+                config("A", "old", 1),
+                config("C", "c", 1),
+                config("X", "x", 1),
+            ],
+        },
+    )
+    module = make_module(snapshot_id="$last")
+
+    configs = config_backup.latest_configs(module, client)
+
+    assert configs == dict(A=config("A", "new", 2), C=config("C", "c", 1))
+    filters = sorted(
+        (
+            call["filters"]
+            for call in client.calls
+            if call["path"] == "management/configuration"
+        ),
+        key=json.dumps,
+    )
+    assert filters == [
+        {"or": [{"sn": ["eq", "A"]}, {"sn": ["eq", "B"]}]},
+        {"or": [{"sn": ["eq", "C"]}]},
+    ]
+
+
+def test_run_skips_unsafe_serial_numbers(tmp_path, make_module, make_client):
+    dest = tmp_path / "configs"
+    dest.mkdir()
+    client = make_client(
+        tables={
+            "management/configuration": [
+                config("A"),
+                config("../escape"),
+                config(".."),
+                config(""),
+            ],
+        },
+    )
+    module = make_module(dest=str(dest))
+
+    changed, msg, data = config_backup.run(module, client)
+
+    assert changed
+    assert data["downloaded"] == ["A"]
+    assert data["skipped"] == ["", "..", "../escape"]
+    assert len(module.warnings) == 3
+    assert sorted(p.name for p in tmp_path.rglob("*.txt")) == ["A.txt"]
+
+
+@pytest.mark.parametrize("sn", ["", ".", "..", "a/b", "../a"])
+def test_config_path_rejects_unsafe_serial_numbers(tmp_path, sn):
+    with pytest.raises(errors.IPFabricError, match="not a valid file name"):
+        config_backup.config_path(str(tmp_path), sn)
+
+
+@pytest.fixture
+def dest(tmp_path):
+    dest = tmp_path / "configs"
+    dest.mkdir()
+    return dest
+
+
+def write_backup(dest, index):
+    (dest / config_backup.INDEX_FILE).write_text(json.dumps(index))
+    for sn in index:
+        (dest / "{0}.txt".format(sn)).write_text("old")
+
+
+def read_backup_index(dest):
+    return json.loads((dest / config_backup.INDEX_FILE).read_text())
+
+
+def test_run_downloads_only_changed_configs(dest, make_module, make_client):
+    write_backup(
+        dest,
+        dict(
+            SAME=dict(hostname="same", hash="h1"),
+            CHANGED=dict(hostname="changed", hash="h1"),
+        ),
+    )
+    client = make_client(
+        tables={
+            "management/configuration": [
+                config("SAME", "h1"),
+                config("CHANGED", "h2"),
+                config("NEW", "h3"),
+            ],
+        },
+    )
+
+    changed, msg, data = config_backup.run(
+        make_module(dest=str(dest)),
+        client,
+    )
+
+    assert changed
+    assert sorted(data["downloaded"]) == ["CHANGED", "NEW"]
+    assert data["unchanged"] == 1
+    assert len(client.downloads) == 2
+    assert (dest / "SAME.txt").read_text() == "old"
+    assert "hash=h2" in (dest / "CHANGED.txt").read_text()
+    assert read_backup_index(dest) == dict(
+        SAME=dict(hostname="same", hash="h1"),
+        CHANGED=dict(hostname="changed", hash="h2"),
+        NEW=dict(hostname="new", hash="h3"),
+    )
+
+
+def test_run_downloads_missing_files(dest, make_module, make_client):
+    write_backup(dest, dict(A=dict(hostname="a", hash="h1")))
+    (dest / "A.txt").unlink()
+    client = make_client(tables={"management/configuration": [config("A")]})
+
+    changed, msg, data = config_backup.run(
+        make_module(dest=str(dest)),
+        client,
+    )
+
+    assert data["downloaded"] == ["A"]
+    assert (dest / "A.txt").exists()
+
+
+def test_run_nothing_changed(dest, make_module, make_client):
+    write_backup(dest, dict(A=dict(hostname="a", hash="h1")))
+    client = make_client(tables={"management/configuration": [config("A")]})
+
+    changed, msg, data = config_backup.run(
+        make_module(dest=str(dest)),
+        client,
+    )
+
+    assert not changed
+    assert client.downloads == []
+
+
+def test_run_partial_failure_keeps_successful_downloads(
+    dest,
+    make_module,
+    make_client,
+):
+    write_backup(dest, dict(BAD=dict(hostname="bad", hash="h1")))
+    client = make_client(
+        tables={
+            "management/configuration": [
+                config("GOOD", "h2"),
+                config("BAD", "broken"),
+            ],
+        },
+    )
+    client.failing_downloads.add("broken")
+
+    with pytest.raises(errors.IPFabricError, match="BAD: .*download failed"):
+        config_backup.run(make_module(dest=str(dest)), client)
+
+    assert read_backup_index(dest) == dict(
+        BAD=dict(hostname="bad", hash="h1"),
+        GOOD=dict(hostname="good", hash="h2"),
+    )
+    assert (dest / "BAD.txt").read_text() == "old"
+    assert sorted(path.name for path in dest.iterdir()) == [
+        config_backup.INDEX_FILE,
+        "BAD.txt",
+        "GOOD.txt",
+    ]
+
+
+def test_run_check_mode_downloads_nothing(dest, make_module, make_client):
+    client = make_client(tables={"management/configuration": [config("A")]})
+    module = make_module(check_mode=True, dest=str(dest))
+
+    changed, msg, data = config_backup.run(module, client)
+
+    assert changed
+    assert data["downloaded"] == ["A"]
+    assert list(dest.iterdir()) == []
+
+
+def test_corrupt_index_fails(dest, make_module, make_client):
+    (dest / config_backup.INDEX_FILE).write_text("{not json")
+
+    with pytest.raises(errors.IPFabricError, match="Invalid hash index"):
+        config_backup.run(make_module(dest=str(dest)), make_client())
@@ -0,0 +1,93 @@
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+import json
+
+import pytest
+
+from ansible_collections.axiansdeveloper.ipfabric.plugins.module_utils import (
+    errors,
+)
+from ansible_collections.axiansdeveloper.ipfabric.plugins.modules import (
+    intent_facts,
+)
+
+
+PARAMS = dict(
+    snapshot_id="$last",
+    intents=None,
+    dest=None,
+    detail_columns=["sn", "hostname"],
+    max_workers=2,
+    page_size=1000,
+)
+
+
+def intent(intent_id, table):
+    return dict(
+        id=intent_id,
+        name="Intent {0}".format(intent_id),
+        apiEndpoint="/tables/{0}".format(table),
+        webEndpoint="/{0}".format(table),
+        result=dict(count=1, checks={"30": 1}),
+    )
+
+
+INTENTS = [intent("1", "inventory/devices"), intent("2", "routing/ospf")]
+TABLES = {"inventory/devices": [dict(sn="A", hostname="a")]}
+
+
+@pytest.fixture
+def client(make_client):
+    return make_client(
+        tables=TABLES,
+        responses={"reports?snapshot=$last": INTENTS},
+    )
+
+
+def test_failed_intent_reports_error(tmp_path, make_module, client):
+    dest = tmp_path / "rows.jsonl"
+    module = make_module(dest=str(dest))
+
+    changed, msg, data = intent_facts.run(module, client)
+
+    assert changed
+    assert "error" not in data[0]
+    assert "422" in data[1]["error"]
+    assert [json.loads(line) for line in dest.read_text().splitlines()] == [
+        dict(intent="1", row=dict(sn="A", hostname="a")),
+    ]
+
+
+def test_check_mode_does_not_write_dest(tmp_path, make_module, client):
+    dest = tmp_path / "rows.jsonl"
+    module = make_module(check_mode=True, dest=str(dest))
+
+    changed, msg, data = intent_facts.run(module, client)
+
+    assert changed
+    assert len(data) == 2
+    assert not dest.exists()
+
+
+def test_without_dest_is_not_changed(make_module, client):
+    changed, msg, data = intent_facts.run(make_module(), client)
+
+    assert not changed
+    assert data[1]["checks"]["red"] == 1
+
+
+def test_select_intents_by_id_or_name(make_module, client):
+    module = make_module(intents=["1", "Intent 2"])
+
+    changed, msg, data = intent_facts.run(module, client)
+
+    assert [summary["id"] for summary in data] == ["1", "2"]
+
+
+def test_unknown_intents_fail(make_module, client):
+    module = make_module(intents=["1", "NTP Sorces", "42"])
+
+    with pytest.raises(errors.IPFabricError, match="NTP Sorces, 42$"):
+        intent_facts.run(module, client)
@@ -0,0 +1,112 @@
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+import pytest
+
+from ansible_collections.axiansdeveloper.ipfabric.plugins.module_utils import (
+    errors,
+)
+from ansible_collections.axiansdeveloper.ipfabric.plugins.modules import (
+    path_lookup,
+)
+
+PARAMS = dict(
+    snapshot_id="$last",
+    flows=[],
+    max_workers=2,
+    fail_on_error=True,
+)
+
+
+def flow(destination, protocol="tcp", source_port="1024-65535", port="80"):
+    return dict(
+        source="10.0.0.1",
+        destination=destination,
+        protocol=protocol,
+        source_port=source_port,
+        destination_port=port,
+    )
+
+
+def graph(payload):
+    parameters = payload["parameters"]
+    if parameters["destinationPoint"] == "10.0.9.9":
+        raise errors.UnexpectedAPIResponse(500, "lookup failed")
+    return dict(
+        graphResult=dict(
+            pathlookup=dict(
+                passingTraffic=parameters["destinationPoint"],
+                eventsSummary={},
+            ),
+        ),
+    )
+
+
+@pytest.fixture
+def client(make_client):
+    return make_client(responses=dict(graphs=graph))
+
+
+def test_lookup_deduplicates_and_keeps_order(make_module, client):
+    flows = [flow("10.0.1.2"), flow("10.0.1.1"), flow("10.0.1.2")]
+
+    msg, data = path_lookup.run(make_module(flows=flows), client)
+
+    assert len(client.calls) == 2
+    assert [result["destination"] for result in data] == [
+        "10.0.1.2",
+        "10.0.1.1",
+        "10.0.1.2",
+    ]
+    assert [result["passing_traffic"] for result in data] == [
+        "10.0.1.2",
+        "10.0.1.1",
+        "10.0.1.2",
+    ]
+    assert msg == "Looked up 3 flows (2 unique, 0 failed)"
+
+
+def test_icmp_ignores_ports(make_module, client):
+    flows = [
+        flow("10.0.1.1", protocol="icmp", port="80"),
+        flow("10.0.1.1", protocol="icmp", source_port="1", port="443"),
+    ]
+
+    msg, data = path_lookup.run(make_module(flows=flows), client)
+
+    assert len(client.calls) == 1
+    l4_options = client.calls[0]["data"]["parameters"]["l4Options"]
+    assert l4_options == {"type": 8, "code": 0}
+    assert data[0]["source_port"] is None
+    assert data[0] == data[1]
+
+
+def test_failed_flow_reported_per_flow(make_module, client):
+    flows = [flow("10.0.1.1"), flow("10.0.9.9")]
+    module = make_module(flows=flows, fail_on_error=False)
+
+    msg, data = path_lookup.run(module, client)
+
+    assert data[0]["passing_traffic"] == "10.0.1.1"
+    assert "error" not in data[0]
+    assert "lookup failed" in data[1]["error"]
+    assert msg.endswith("1 failed)")
+
+
+def test_failed_flow_fails_by_default(make_module, client):
+    flows = [flow("10.0.1.1"), flow("10.0.9.9")]
+
+    with pytest.raises(errors.IPFabricError, match="10.0.9.9"):
+        path_lookup.run(make_module(flows=flows), client)
+
+
+def test_auth_error_is_not_caught(make_module, make_client):
+    def denied(payload):
+        raise errors.AuthError("Failed to authenticate with IPFabric")
+
+    client = make_client(responses=dict(graphs=denied))
+    module = make_module(flows=[flow("10.0.1.1")], fail_on_error=False)
+
+    with pytest.raises(errors.AuthError):
+        path_lookup.run(module, client)
@@ -0,0 +1,288 @@
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+import json
+import time
+
+import pytest
+
+from ansible_collections.axiansdeveloper.ipfabric.plugins.module_utils import (
+    errors,
+)
+from ansible_collections.axiansdeveloper.ipfabric.plugins.modules import (
+    snapshot,
+)
+
+
+PARAMS = dict(
+    state="load",
+    snapshot_id="target",
+    max_loaded=None,
+    usage_file=None,
+    rediscover_rules=None,
+)
+
+
+def snap(snapshot_id, state="loaded", ts_end=0, locked=False):
+    return dict(id=snapshot_id, state=state, tsEnd=ts_end, locked=locked)
+
+
+def test_plan_unloads_least_recently_used_first():
+    snapshots = [
+        snap("new", ts_end=3000),
+        snap("old", ts_end=1000),
+        snap("mid", ts_end=2000),
+        snap("target", state="unloaded"),
+    ]
+
+    unloads, within_budget = snapshot.plan_unloads(
+        snapshots,
+        "target",
+        2,
+        {},
+    )
+
+    assert unloads == ["old", "mid"]
+    assert within_budget
+
+
+def test_plan_unloads_usage_overrides_discovery_time():
+    snapshots = [snap("a", ts_end=1000), snap("b", ts_end=2000)]
+
+    unloads, _ = snapshot.plan_unloads(snapshots, "target", 2, {"a": 5.0})
+
+    assert unloads == ["b"]
+
+
+def test_plan_unloads_skips_locked_and_counts_loading():
+    snapshots = [
+        snap("locked", ts_end=1000, locked=True),
+        snap("loading", state="loading", ts_end=1500),
+        snap("loaded", ts_end=2000),
+        snap("unloaded", state="unloaded"),
+    ]
+
+    unloads, within_budget = snapshot.plan_unloads(
+        snapshots,
+        "target",
+        2,
+        {},
+    )
+
+    assert unloads == ["loaded"]
+    assert not within_budget
+
+
+def test_plan_unloads_target_already_loaded_within_budget():
+    snapshots = [snap("target"), snap("other")]
+
+    assert snapshot.plan_unloads(snapshots, "target", 2, {}) == ([], True)
+
+
+def test_ensure_loaded_within_budget(tmp_path, make_module, make_client):
+    usage_file = tmp_path / "usage.json"
+    usage_file.write_text(json.dumps({"recent": 10.0, "stale": 1.0}))
+    client = make_client(
+        snapshots=[
+            snap("recent"),
+            snap("stale"),
+            snap("target", state="unloaded"),
+        ],
+    )
+    module = make_module(max_loaded=2, usage_file=str(usage_file))
+
+    changed, msg, data = snapshot.run(module, client)
+
+    assert changed
+    assert sorted(client.loads) == [("stale", "unload"), ("target", "load")]
+    assert data == [
+        dict(id="stale", state="unload"),
+        dict(id="target", state="load"),
+    ]
+    assert "target" in json.loads(usage_file.read_text())
+
+
+def test_ensure_loaded_within_budget_check_mode(
+    tmp_path,
+    make_module,
+    make_client,
+):
+    usage_file = tmp_path / "usage.json"
+    client = make_client(
+        snapshots=[snap("other"), snap("target", state="unloaded")],
+    )
+    module = make_module(
+        check_mode=True,
+        max_loaded=1,
+        usage_file=str(usage_file),
+    )
+
+    changed, msg, data = snapshot.run(module, client)
+
+    assert changed
+    assert client.loads == []
+    assert not usage_file.exists()
+
+
+@pytest.mark.parametrize("max_loaded", [0, -1])
+def test_max_loaded_below_one_fails(max_loaded, make_module, make_client):
+    client = make_client(snapshots=[snap("target")])
+
+    with pytest.raises(errors.IPFabricError, match="at least 1"):
+        snapshot.run(make_module(max_loaded=max_loaded), client)
+
+
+def test_corrupt_usage_file_fails(tmp_path, make_module, make_client):
+    usage_file = tmp_path / "usage.json"
+    usage_file.write_text("{not json")
+    module = make_module(max_loaded=1, usage_file=str(usage_file))
+
+    with pytest.raises(errors.IPFabricError, match="Invalid usage_file"):
+        snapshot.run(module, make_client(snapshots=[snap("target")]))
+
+
+def device(sn, age=0, version="17.3", ip=None):
+    return dict(
+        sn=sn,
+        hostname=sn.lower(),
+        loginIp=ip or "10.0.0.1",
+        version=version,
+        tsDiscoveryEnd=(time.time() - age) * 1000,
+    )
+
+
+@pytest.fixture
+def rediscover(make_module, make_client):
+    def run(tables, check_mode=False, **rules):
+        module = make_module(
+            check_mode=check_mode,
+            state="rediscover",
+            rediscover_rules=rules,
+        )
+        client = make_client(tables=tables)
+        return snapshot.run(module, client), client
+
+    return run
+
+
+def test_rediscover_stale_devices(rediscover):
+    tables = {
+        "inventory/devices": [
+            device("OLD", age=7200),
+            device("NEW", age=60),
+            dict(device("NEVER"), tsDiscoveryEnd=None),
+        ],
+    }
+
+    (changed, msg, plan), client = rediscover(tables, max_age=3600)
+
+    assert changed
+    assert [entry["sn"] for entry in plan] == ["OLD", "NEVER"]
+    assert plan[0]["reasons"] == ["stale"]
+    assert client.rediscovered == ["OLD", "NEVER"]
+
+
+def test_rediscover_max_age_zero_selects_all(rediscover):
+    tables = {"inventory/devices": [device("A", age=1), device("B", age=1)]}
+
+    (changed, msg, plan), client = rediscover(tables, max_age=0)
+
+    assert client.rediscovered == ["A", "B"]
+
+
+def test_rediscover_task_errors_and_versions(rediscover):
+    tables = {
+        "inventory/devices": [
+            device("ERR", ip="10.0.0.2"),
+            device("VER", version="16.9"),
+            device("OK"),
+        ],
+        "reports/discovery-errors": [dict(ip="10.0.0.2")],
+    }
+
+    (changed, msg, plan), client = rediscover(
+        tables,
+        task_errors=True,
+        versions={"VER": "17.3", "OK": "17.3"},
+    )
+
+    assert plan == [
+        dict(sn="ERR", hostname="err", reasons=["task_error"]),
+        dict(sn="VER", hostname="ver", reasons=["version"]),
+    ]
+
+
+def test_rediscover_check_mode(rediscover):
+    tables = {"inventory/devices": [device("OLD", age=7200)]}
+
+    (changed, msg, plan), client = rediscover(
+        tables,
+        check_mode=True,
+        max_age=3600,
+    )
+
+    assert changed
+    assert len(plan) == 1
+    assert client.rediscovered is None
+
+
+def test_rediscover_nothing_to_do(rediscover):
+    tables = {"inventory/devices": [device("NEW", age=60)]}
+
+    (changed, msg, plan), client = rediscover(tables, max_age=3600)
+
+    assert not changed
+    assert plan == []
+    assert client.rediscovered is None
+
+
+def test_usage_file_keeps_concurrent_records(
+    tmp_path,
+    make_module,
+    make_client,
+):
+    usage_file = tmp_path / "usage.json"
+    usage_file.write_text(json.dumps({"other": 1.0}))
+    module = make_module(max_loaded=2, usage_file=str(usage_file))
+
+    class Client(make_client):
+        def snapshot_load(self, snapshot_id, state, check_exists=True):
+            # Another job records its load while this one runs.
+            usage_file.write_text(json.dumps({"other": 1.0, "job": 2.0}))
+            super(Client, self).snapshot_load(
+                snapshot_id,
+                state,
+                check_exists,
+            )
+
+    client = Client(snapshots=[snap("target", state="unloaded")])
+
+    snapshot.run(module, client)
+
+    usage = json.loads(usage_file.read_text())
+    assert sorted(usage) == ["job", "other", "target"]
+    assert [path.name for path in tmp_path.iterdir()] == ["usage.json"]
+
+
+def test_rediscover_trailing_zero_version(rediscover):
+    tables = {
+        "inventory/devices": [
+            device("OK", version="17.10"),
+            device("OLD", version="17.1"),
+        ],
+    }
+
+    (changed, msg, plan), client = rediscover(
+        tables,
+        versions={"OK": "17.10", "OLD": "17.10"},
+    )
+
+    assert client.rediscovered == ["OLD"]
+
+
+def test_rediscover_rejects_unquoted_versions(rediscover):
+    tables = {"inventory/devices": [device("A", version="17.10")]}
+
+    with pytest.raises(errors.IPFabricError, match="quoted.*: A, B"):
+        rediscover(tables, versions={"B": 17.1, "A": 17.10, "C": "17.10"})
@@ -0,0 +1,165 @@
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+import pytest
+
+from ansible_collections.axiansdeveloper.ipfabric.plugins.module_utils import (
+    errors,
+)
+from ansible_collections.axiansdeveloper.ipfabric.plugins.modules import (
+    snapshot_diff,
+)
+
+
+PARAMS = dict(
+    snapshot_id="before",
+    compare_snapshot_id="after",
+    table="inventory/devices",
+    columns=["sn", "hostname", "version"],
+    key=["sn"],
+    page_size=1000,
+)
+
+
+def diff(make_module, make_client, tables, **params):
+    client = make_client(tables={"inventory/devices": tables})
+    return snapshot_diff.diff_table(make_module(**params), client), client
+
+
+def device(sn, version="1"):
+    return dict(sn=sn, hostname=sn.lower(), version=version)
+
+
+def test_diff_table_returns_only_differences(make_module, make_client):
+    data, client = diff(
+        make_module,
+        make_client,
+        dict(
+            before=[device("A"), device("B"), device("C")],
+            after=[device("B"), device("C", version="2"), device("D")],
+        ),
+    )
+
+    assert data["added"] == [device("D")]
+    assert data["removed"] == [device("A")]
+    assert data["changed"] == [
+        dict(before=device("C"), after=device("C", version="2")),
+    ]
+
+
+def test_diff_table_identical_snapshots(make_module, make_client):
+    rows = [device("A"), device("B")]
+
+    data, client = diff(
+        make_module,
+        make_client,
+        dict(before=rows, after=list(rows)),
+    )
+
+    assert data == dict(added=[], removed=[], changed=[])
+
+
+def test_diff_table_composite_key(make_module, make_client):
+    before = [
+        dict(sn="A", intName="eth0", l1="up"),
+        dict(sn="A", intName="eth1", l1="up"),
+    ]
+    after = [
+        dict(sn="A", intName="eth0", l1="down"),
+        dict(sn="A", intName="eth1", l1="up"),
+    ]
+
+    data, client = diff(
+        make_module,
+        make_client,
+        dict(before=before, after=after),
+        columns=["sn", "intName", "l1"],
+        key=["sn", "intName"],
+    )
+
+    assert data["added"] == data["removed"] == []
+    assert data["changed"] == [dict(before=before[0], after=after[0])]
+
+
+def test_diff_table_pages_sorted_by_key(make_module, make_client):
+    data, client = diff(
+        make_module,
+        make_client,
+        dict(before=[], after=[]),
+        page_size=50,
+    )
+
+    assert [call["snapshot_id"] for call in client.calls] == [
+        "before",
+        "after",
+    ]
+    for call in client.calls:
+        assert call["sort"] == {"order": "asc", "column": "sn"}
+        assert call["page_size"] == 50
+
+
+@pytest.mark.parametrize("duplicated", ["before", "after"])
+def test_diff_table_duplicate_key_fails(
+    duplicated,
+    make_module,
+    make_client,
+):
+    tables = dict(before=[device("A")], after=[device("A")])
+    tables[duplicated] = [device("A"), device("A", version="2")]
+
+    with pytest.raises(errors.IPFabricError, match=duplicated):
+        diff(make_module, make_client, tables)
+
+
+def interface(sn, name, l1="up"):
+    return dict(sn=sn, intName=name, l1=l1)
+
+
+def test_diff_table_refetches_ties_across_pages(make_module, make_client):
+    # With page_size 3 the five "A" rows cross a page boundary, and the
+    # fake client returns them in a different order for each page.
+    before = [interface("A", "eth{0}".format(i)) for i in range(5)]
+    before.append(interface("B", "eth0"))
+    after = [dict(row) for row in before]
+    after[4]["l1"] = "down"
+
+    data, client = diff(
+        make_module,
+        make_client,
+        dict(before=before, after=after),
+        columns=["sn", "intName", "l1"],
+        key=["sn", "intName"],
+        page_size=3,
+    )
+
+    assert data["added"] == data["removed"] == []
+    assert data["changed"] == [dict(before=before[4], after=after[4])]
+    refetches = [call for call in client.calls if call["filters"]]
+    assert [call["filters"] for call in refetches] == [
+        {"sn": ["eq", "A"]},
+        {"sn": ["eq", "A"]},
+    ]
+    assert all(
+        call["sort"] == {"order": "asc", "column": "intName"}
+        for call in refetches
+    )
+
+
+def test_diff_table_ties_within_a_page_are_not_refetched(
+    make_module,
+    make_client,
+):
+    rows = [interface("A", "eth0"), interface("A", "eth1")]
+
+    data, client = diff(
+        make_module,
+        make_client,
+        dict(before=rows, after=rows),
+        columns=["sn", "intName", "l1"],
+        key=["sn", "intName"],
+        page_size=3,
+    )
+
+    assert data == dict(added=[], removed=[], changed=[])
+    assert not any(call["filters"] for call in client.calls)
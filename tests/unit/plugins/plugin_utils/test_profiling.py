@@ -0,0 +1,82 @@
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+from ansible_collections.axiansdeveloper.ipfabric.plugins.plugin_utils import (
+    profiling,
+)
+
+
+def report(calls, memory, python="3.11.7"):
+    return dict(
+        devices=1,
+        versions=dict(python=python, ansible="2.19.0"),
+        phases=dict(
+            constructed=dict(
+                function_calls_per_device=calls,
+                peak_memory=memory,
+            ),
+        ),
+    )
+
+
+def test_compare_reports_within_tolerance():
+    regressions = profiling.compare_reports(
+        report(10.5, 105),
+        report(10, 100),
+        0.1,
+    )
+
+    assert regressions == []
+
+
+def test_compare_reports_regressions():
+    regressions = profiling.compare_reports(
+        report(20, 200),
+        report(10, 100),
+        0.1,
+    )
+
+    assert len(regressions) == 2
+    assert regressions[0].startswith("constructed function_calls_per_device")
+
+
+def test_compare_reports_skips_memory_on_version_mismatch():
+    regressions = profiling.compare_reports(
+        report(10, 200, python="3.12.0"),
+        report(10, 100),
+        0.1,
+    )
+
+    assert regressions == []
+
+
+def test_compare_reports_skips_unmeasured_memory():
+    regressions = profiling.compare_reports(
+        report(10, None),
+        report(10, 100),
+        0,
+    )
+
+    assert regressions == []
+
+
+def test_report_counts_own_calls_only():
+    profiler = profiling.Profiler()
+    profiler.devices = 1
+    profiler.start()
+    try:
+        with profiler.phase("idle"):
+            sorted(range(10))
+        with profiler.phase("busy"):
+            sorted(range(10))
+            profiling.versions()
+            profiling.versions()
+    finally:
+        profiler.stop()
+
+    phases = profiler.report()["phases"]
+    assert (
+        phases["busy"]["function_calls_per_device"]
+        - phases["idle"]["function_calls_per_device"]
+    ) == 2